@@ -0,0 +1,134 @@
+"""Deterministic, offline stand-ins for the Jira, Review Board and Graph payloads."""
+import random
+from datetime import datetime, timedelta
+
+SEVERITIES = ["Critical", "Major", "Minor", None]
+PRIORITIES = ["High", "Medium", "Low"]
+STATUSES = ["Open", "Handling", "In Progress", "Reopened"]
+ISSUE_TYPES = ["PR", "Bug", "Task", "Story"]
+PEOPLE = [f"User {n}" for n in range(40)]
+ME = {"displayName": "Me", "name": "me", "key": "me", "emailAddress": "me@example.com", "active": True}
+WORDS = "alarm export service activation fails after upgrade when node restarts intermittently on the shelf with".split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def person(rng):
+    name = rng.choice(PEOPLE)
+    return {"displayName": name, "name": name.lower().replace(" ", ""), "emailAddress": name.lower().replace(" ", ".") + "@example.com", "active": True}
+
+
+def jira_issue(index, rng):
+    key = f"LSN-{40000 + index}"
+    severity = rng.choice(SEVERITIES)
+    return {
+        "expand": "operations,versionedRepresentations,editmeta,changelog,renderedFields",
+        "id": str(100000 + index),
+        "self": f"https://jira.example.com/rest/api/2/issue/{100000 + index}",
+        "key": key,
+        "fields": {
+            "summary": sentence(rng, rng.randint(6, 16)),
+            "issuetype": {"name": rng.choice(ISSUE_TYPES), "subtask": False, "iconUrl": "https://jira.example.com/images/icons/bug.png"},
+            "status": {"name": rng.choice(STATUSES), "statusCategory": {"key": "indeterminate", "colorName": "yellow"}},
+            "creator": person(rng),
+            "assignee": ME,
+            "resolution": None,
+            "reporter": person(rng),
+            "customfield_10423": {"value": severity, "id": str(10500 + SEVERITIES.index(severity))} if severity else None,
+            "customfield_10007": {"value": "MKT Stopper", "id": "10010"} if rng.random() < 0.1 else None,
+            "fixVersions": [{"name": f"R{rng.randint(20, 25)}.{rng.randint(0, 4)}", "released": False}] if rng.random() < 0.7 else [],
+            "priority": {"name": rng.choice(PRIORITIES), "id": "3"},
+            "duedate": f"2025-09-{rng.randint(1, 30):02d}" if rng.random() < 0.4 else None,
+            "labels": rng.sample(["ui", "backend", "regression", "customer"], rng.randint(0, 2)),
+            "updated": f"2025-09-{rng.randint(1, 30):02d}T10:00:00.000+0000",
+        },
+    }
+
+
+def jira_search(count, seed=0, start_at=0, total=None):
+    """A ``/rest/api/2/search`` response body with ``count`` issues starting at ``start_at``."""
+    rng = random.Random(seed + start_at)
+    return {
+        "expand": "schema,names",
+        "startAt": start_at,
+        "maxResults": count,
+        "total": count if total is None else total,
+        "issues": [jira_issue(start_at + index, rng) for index in range(count)],
+    }
+
+
+def review_description(index, rng):
+    if rng.random() < 0.7:
+        return (
+            f"Jira: LSN-{40000 + index}\n"
+            f"Fix Description: {sentence(rng, rng.randint(8, 30))}\n"
+            f"Impacts UI: {rng.choice(['Yes', 'No'])}\nTesting Done: {sentence(rng, 6)}"
+        )
+    return sentence(rng, rng.randint(8, 40))
+
+
+def review_request(index, rng):
+    request_id = 45000 + index
+    return {
+        "id": request_id,
+        "summary": sentence(rng, 8),
+        "description": review_description(index, rng),
+        "status": "pending",
+        "last_updated": f"2025-09-{rng.randint(1, 30):02d}T10:00:00Z",
+        "target_people": [{"title": person(rng)["name"], "href": "https://rb.example.com/api/users/"} for _ in range(rng.randint(1, 4))],
+        "links": {
+            "self": {"href": f"https://rb.example.com/api/review-requests/{request_id}/"},
+            "submitter": {"title": person(rng)["name"], "href": "https://rb.example.com/api/users/"},
+        },
+    }
+
+
+def review_request_list(count, seed=0, start=0, total=None):
+    """A ``/api/review-requests/`` response body with ``count`` requests."""
+    rng = random.Random(seed + start)
+    return {
+        "stat": "ok",
+        "total_results": count if total is None else total,
+        "review_requests": [review_request(start + index, rng) for index in range(count)],
+        "links": {},
+    }
+
+
+def calendar_event(index, rng, day, my_email="me@example.com"):
+    start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(8 * 60, 18 * 60, 15))
+    end = start + timedelta(minutes=rng.choice([15, 30, 60, 90]))
+    attendees = [
+        {"type": rng.choice(["required", "optional"]), "emailAddress": {"name": p["displayName"], "address": p["emailAddress"]}}
+        for p in (person(rng) for _ in range(rng.randint(1, 12)))
+    ]
+    attendees.append({"type": "required", "emailAddress": {"name": "Me", "address": my_email}})
+    return {
+        "id": f"AAMkAD{index:08d}",
+        "subject": ("Canceled: " if rng.random() < 0.05 else "") + sentence(rng, rng.randint(2, 6)),
+        "start": {"dateTime": start.strftime("%Y-%m-%dT%H:%M:%S.0000000"), "timeZone": "UTC"},
+        "end": {"dateTime": end.strftime("%Y-%m-%dT%H:%M:%S.0000000"), "timeZone": "UTC"},
+        "location": {"displayName": rng.choice(["Microsoft Teams Meeting", "Room 4.12", ""])},
+        "organizer": {"emailAddress": {"name": person(rng)["displayName"], "address": "organizer@example.com"}},
+        "attendees": attendees,
+    }
+
+
+def calendar_view(count, seed=0, day=None):
+    """A Graph ``calendarView`` response body with ``count`` events on ``day``."""
+    rng = random.Random(seed)
+    day = day or datetime(2025, 9, 16).date()
+    return {"value": [calendar_event(index, rng, day) for index in range(count)]}
+
+
+TEAM_FIRST_DAY = datetime(2025, 9, 1).date()
+
+
+def team_calendars(people, days, per_day, seed=0, first_day=TEAM_FIRST_DAY):
+    """One list of Graph events per person, ``per_day`` on each of ``days`` days from ``first_day``."""
+    rng = random.Random(seed)
+    return [
+        [calendar_event(day * per_day + index, rng, first_day + timedelta(days=day)) for day in range(days) for index in range(per_day)]
+        for _ in range(people)
+    ]
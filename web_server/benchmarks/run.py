@@ -0,0 +1,182 @@
+"""Offline microbenchmarks for the transformation hot paths.
+
+Run from ``web_server/``::
+
+    python -m benchmarks.run                      # all benchmarks, sizes 10..50k
+    python -m benchmarks.run --only extract_tags --sizes 1000
+    python -m benchmarks.run --only free_busy     # 1..50 people over a month
+    python -m benchmarks.run --save-baseline      # record the current numbers
+
+When a baseline file exists, each result is compared against it and the
+run exits with status 1 if any median time regressed by more than
+``--tolerance``.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from tzlocal import get_localzone
+
+from benchmarks.fixtures import calendar_view, jira_search, review_request_list, team_calendars, TEAM_FIRST_DAY
+from freebusy import FreeBusy
+from main import extract_tags, filtered_jira_json, format_event
+from scheduler import build_schedule
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 50000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MY_EMAIL = "me@example.com"
+MEETINGS_PER_DAY = 12
+MONTH_DAYS = 31
+
+
+def bench_filtered_jira_json(size):
+    issues = jira_search(size)["issues"]
+    return lambda: [filtered_jira_json(issue) for issue in issues]
+
+
+def bench_extract_tags(size):
+    descriptions = [request["description"] for request in review_request_list(size)["review_requests"]]
+    return lambda: [extract_tags(description) for description in descriptions]
+
+
+def bench_format_event(size):
+    events = calendar_view(size)["value"]
+    local_tz = get_localzone()
+    return lambda: [format_event(event, True, MY_EMAIL, local_tz) for event in events]
+
+
+def bench_build_schedule(size):
+    # `size` tasks, split between Jira issues and reviews, around a normal day of meetings
+    local_tz = get_localzone()
+    calendar = [format_event(event, True, MY_EMAIL, local_tz) for event in calendar_view(MEETINGS_PER_DAY)["value"]]
+    jira_tasks = [filtered_jira_json(issue) for issue in jira_search(size - size // 2)["issues"]]
+    reviews = []
+    for request in review_request_list(size // 2)["review_requests"]:
+        review = {"id": request["id"], "description": request["description"], "due_date": request["last_updated"][:10]}
+        reviews.append(review)
+    return lambda: build_schedule(calendar, reviews, jira_tasks)
+
+
+def bench_free_busy(size):
+    # `size` people with a month of meetings: occupancy, everyone's common gaps and an 80% quorum
+    local_tz = get_localzone()
+    calendars = [[format_event(event, False, MY_EMAIL, local_tz) for event in events]
+                 for events in team_calendars(size, MONTH_DAYS, MEETINGS_PER_DAY // 2)]
+
+    def run():
+        free_busy = FreeBusy(calendars, TEAM_FIRST_DAY, MONTH_DAYS)
+        return free_busy.common_free(30), free_busy.common_free(30, quorum=int(size * 0.8)), free_busy.utilization()
+    return run
+
+
+BENCHMARKS = {
+    "filtered_jira_json": bench_filtered_jira_json,
+    "extract_tags": bench_extract_tags,
+    "format_event": bench_format_event,
+    "build_schedule": bench_build_schedule,
+    "free_busy": bench_free_busy,
+}
+# Benchmarks whose size is not a record count get their own defaults
+BENCHMARK_SIZES = {"free_busy": [1, 10, 50]}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(run, size, min_time, min_runs, max_runs):
+    run()  # warm up
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    result = run()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    p50 = percentile(samples, 0.5)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(p50 * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "records_per_s": round(size / p50) if p50 else None,
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(current / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before or not before.get("p50_ms"):
+            result["vs_baseline"] = None
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"]
+        result["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+    return regressions
+
+
+def report(results):
+    header = f"{'benchmark':<28}{'runs':>6}{'p50 ms':>11}{'p99 ms':>11}{'records/s':>13}{'peak KiB':>11}{'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    for key, r in results.items():
+        ratio = f"{r['vs_baseline']:.2f}x" if r.get("vs_baseline") else "-"
+        print(f"{key:<28}{r['runs']:>6}{r['p50_ms']:>11.3f}{r['p99_ms']:>11.3f}{r['records_per_s'] or 0:>13,}{r['peak_kib']:>11,.1f}{ratio:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", help=f"comma-separated record counts (default {','.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only this benchmark (repeatable)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to keep sampling each case")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--max-runs", type=int, default=1000)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file to compare against / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        sizes = [int(size) for size in args.sizes.split(",") if size] if args.sizes else BENCHMARK_SIZES.get(name, DEFAULT_SIZES)
+        for size in sizes:
+            run = BENCHMARKS[name](size)
+            results[f"{name}[{size}]"] = measure(run, size, args.min_time, args.min_runs, args.max_runs)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.tolerance)
+    report(results)
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        for result in merged.values():
+            result.pop("vs_baseline", None)
+        with open(args.baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": merged}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\nRegressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
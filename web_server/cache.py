@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from singleflight import SingleFlight
+from upstream import UpstreamError
+
+logger = logging.getLogger(__name__)
+
+HIT = "HIT"
+MISS = "MISS"
+STALE = "STALE"
+BYPASS = "BYPASS"
+FALLBACK = "FALLBACK"
+
+
+class TTLCache:
+    """Size-bounded TTL cache with stale-while-revalidate.
+
+    Entries younger than ``ttl`` are served as hits. Entries older than that
+    but younger than ``ttl + max_stale`` are served as-is while one background
+    task reloads them. Anything older is loaded inline. Concurrent loads of
+    the same key (misses, ``fresh`` bypasses and background refreshes) share
+    one ``loader()`` call. When a load fails with ``UpstreamError`` (e.g. the
+    upstream's circuit is open), the last value held for the key is served
+    as a ``FALLBACK``, however old.
+
+    With a ``PersistentCache`` as ``store``, every value is also written to
+    disk. A key not in memory (e.g. after a restart) is restored from disk
+    and served at once, as ``STALE`` while a background load refreshes it if
+    it is older than ``ttl``. Before calling ``loader()`` the disk copy is
+    checked too, so a fresher value saved by another worker is reused.
+    ``on_restore(key, value)`` is called for values that came from disk.
+    ``valid_since()``, if given, returns the wall-clock time before which a
+    disk copy is never used (e.g. the start of the day for dated data).
+    """
+
+    def __init__(self, name, ttl, max_entries=32, max_stale=None, store=None, schema=1, on_restore=None, valid_since=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stale = max_stale if max_stale is not None else ttl * 10
+        self._entries = OrderedDict()
+        self._refreshing = {}
+        self._flight = SingleFlight()
+        self.store = store
+        self.schema = schema
+        self.on_restore = on_restore
+        self.valid_since = valid_since
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.bypasses = 0
+        self.refresh_errors = 0
+        self.fallbacks = 0
+        self.restored = 0
+        self.shared_loads = 0
+
+    async def get(self, key, loader, fresh=False):
+        """Return ``(value, status)`` for ``key``, calling ``loader()`` when needed."""
+        entry = self._entries.get(key)
+        restored = False
+        if entry is None and self.store is not None:
+            entry = await self._restore(key)
+            restored = entry is not None
+        if fresh:
+            self.bypasses += 1
+            return await self._load_or_fallback(key, loader, entry, BYPASS, shared=False)
+
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value, HIT
+            # Restored data is served however old: answering now beats waiting on the upstream
+            if age < self.ttl + self.max_stale or restored:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh_in_background(key, loader)
+                return value, STALE
+
+        self.misses += 1
+        return await self._load_or_fallback(key, loader, entry, MISS)
+
+    def peek(self, key):
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key, value):
+        self._store_entry(key, value, time.monotonic())
+        if self.store is not None:
+            self.store.save(self.name, key, value, self.schema)
+
+    def _store_entry(self, key, value, stored_at):
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _usable(self, record):
+        return record is not None and (self.valid_since is None or record.stored_at >= self.valid_since())
+
+    def _from_disk(self, key, record):
+        # Wall-clock age of the disk copy, mapped onto the monotonic clock used in memory
+        stored_at = time.monotonic() - max(time.time() - record.stored_at, 0)
+        self._store_entry(key, record.value, stored_at)
+        if self.on_restore is not None:
+            self.on_restore(key, record.value)
+        return record.value, stored_at
+
+    async def _restore(self, key):
+        record = await self.store.read(self.name, key, self.schema)
+        if not self._usable(record) or key in self._entries:
+            return self._entries.get(key)
+        self.restored += 1
+        return self._from_disk(key, record)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "bypasses": self.bypasses,
+            "refresh_errors": self.refresh_errors,
+            "fallbacks": self.fallbacks,
+            "restored": self.restored,
+            "shared_loads": self.shared_loads,
+            "loads": self._flight.started,
+            "coalesced_loads": self._flight.shared,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+    async def _load(self, key, loader, shared=True):
+        async def load():
+            if shared and self.store is not None:
+                record = await self.store.read(self.name, key, self.schema)
+                held = self._entries.get(key)
+                disk_age = time.time() - record.stored_at if self._usable(record) else None
+                if disk_age is not None and disk_age < self.ttl and (held is None or disk_age < time.monotonic() - held[1]):
+                    self.shared_loads += 1
+                    return self._from_disk(key, record)[0]
+            value = await loader()
+            self.set(key, value)
+            return value
+        return await self._flight.do(key, load)
+
+    async def _load_or_fallback(self, key, loader, entry, status, shared=True):
+        try:
+            return await self._load(key, loader, shared), status
+        except UpstreamError as e:
+            if entry is None:
+                raise
+            self.fallbacks += 1
+            logger.warning("Serving last good %s/%s after a failed load: %s", self.name, key, e.detail)
+            return entry[0], FALLBACK
+
+    def _refresh_in_background(self, key, loader):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._load(key, loader))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda t: self._refresh_done(key, t))
+
+    def _refresh_done(self, key, task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+            logger.warning("Background refresh of %s/%s failed: %s", self.name, key, task.exception())
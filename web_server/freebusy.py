@@ -0,0 +1,145 @@
+from datetime import date, timedelta
+from functools import lru_cache
+import numpy as np
+from scheduler import DAY_END, DAY_START, format_clock, is_canceled, parse_clock
+
+MINUTES_PER_DAY = 24 * 60
+WORKING_WEEKDAYS = (0, 1, 2, 3, 4)
+
+# Meeting times repeat a lot (quarter hours), so each distinct string is parsed once
+clock_minutes = lru_cache(maxsize=4096)(parse_clock)
+
+
+@lru_cache(maxsize=1024)
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def event_intervals(calendars, first_day, days, today=None):
+    """``(person, start, end)`` arrays, in minutes since midnight of ``first_day``, for ``format_event`` records.
+
+    ``calendars`` holds one list of events per person. Canceled events and
+    ones without a usable date or time are skipped; an event ending at or
+    before its start time runs past midnight. Intervals are clipped to the
+    ``days``-day range.
+    """
+    today = today or date.today()
+    people, starts, ends = [], [], []
+    for person, events in enumerate(calendars):
+        for event in events:
+            if is_canceled(event):
+                continue
+            start, end = clock_minutes(event.get("start")), clock_minutes(event.get("end"))
+            label = event.get("date")
+            day = today if label == "Today" else parse_date(label)
+            if start is None or end is None or day is None:
+                continue
+            offset = (day - first_day).days * MINUTES_PER_DAY
+            if end <= start:
+                end += MINUTES_PER_DAY
+            people.append(person)
+            starts.append(offset + start)
+            ends.append(offset + end)
+    horizon = days * MINUTES_PER_DAY
+    person = np.array(people, dtype=np.intp)
+    start = np.clip(np.array(starts, dtype=np.int64), 0, horizon)
+    end = np.clip(np.array(ends, dtype=np.int64), 0, horizon)
+    keep = end > start
+    return person[keep], start[keep], end[keep]
+
+
+def occupancy(calendars, first_day, days, today=None):
+    """Meetings covering each minute: an ``int16`` array of shape ``(people, days, MINUTES_PER_DAY)``.
+
+    Each interval adds +1 at its start and -1 at its end, and a cumulative
+    sum along the timeline turns those edges into counts, so the cost is one
+    pass over the array however long the meetings are.
+    """
+    person, start, end = event_intervals(calendars, first_day, days, today)
+    horizon = days * MINUTES_PER_DAY
+    edges = np.zeros((len(calendars), horizon + 1), dtype=np.int16)
+    np.add.at(edges, (person, start), 1)
+    np.add.at(edges, (person, end), -1)
+    return np.cumsum(edges[:, :-1], axis=1, dtype=np.int16).reshape(len(calendars), days, MINUTES_PER_DAY)
+
+
+def working_minutes(first_day, days, hours=(DAY_START, DAY_END), weekdays=WORKING_WEEKDAYS):
+    """``(days, MINUTES_PER_DAY)`` mask of working time."""
+    minute = np.arange(MINUTES_PER_DAY)
+    in_hours = (minute >= hours[0]) & (minute < hours[1])
+    weekday = (first_day.weekday() + np.arange(days)) % 7
+    return np.isin(weekday, weekdays)[:, None] & in_hours[None, :]
+
+
+def runs(mask, min_minutes=1):
+    """``(day, start, end)`` arrays of the runs of ``True`` in each row of a ``(days, minutes)`` mask.
+
+    Runs end at midnight, so a slot never spans two days.
+    """
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    # Row-major order pairs each row's starts with that row's ends
+    day, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)
+    keep = end - start >= min_minutes
+    return day[keep], start[keep], end[keep]
+
+
+class FreeBusy:
+    """Minute-resolution occupancy of several people's calendars over ``days`` days from ``first_day``.
+
+    ``counts[p, d, m]`` is the number of person ``p``'s meetings covering
+    minute ``m`` of day ``d``. Only reading the events loops in Python; free
+    time, double bookings and common gaps are whole-array NumPy operations.
+    Slots are returned as ``{"date", "start", "end", "minutes"}`` records with
+    the clock format ``format_event`` uses.
+    """
+
+    def __init__(self, calendars, first_day, days=1, today=None, working=None):
+        self.first_day = first_day
+        self.days = days
+        self.counts = occupancy(calendars, first_day, days, today)
+        self.busy = self.counts > 0
+        self.working = working_minutes(first_day, days) if working is None else working
+
+    def slots(self, mask, min_minutes=1):
+        day, start, end = runs(mask, min_minutes)
+        return [
+            {
+                "date": (self.first_day + timedelta(days=d)).isoformat(),
+                "start": format_clock(s),
+                "end": format_clock(e % MINUTES_PER_DAY),
+                "minutes": e - s,
+            }
+            for d, s, e in zip(day.tolist(), start.tolist(), end.tolist())
+        ]
+
+    def free(self, person, min_minutes=1):
+        """One person's free working time."""
+        return self.slots(~self.busy[person] & self.working, min_minutes)
+
+    def conflicts(self, person):
+        """Times one person is double-booked."""
+        return self.slots(self.counts[person] > 1)
+
+    def overlap(self, people):
+        """Times all of ``people`` are busy."""
+        return self.slots(self.busy[people].all(axis=0))
+
+    def common_free(self, min_minutes=30, quorum=None, people=None):
+        """Working time when at least ``quorum`` (default: all) of ``people`` (default: everyone) are free."""
+        busy = self.busy if people is None else self.busy[people]
+        free_count = busy.shape[0] - np.count_nonzero(busy, axis=0)
+        quorum = busy.shape[0] if quorum is None else quorum
+        return self.slots((free_count >= quorum) & self.working, min_minutes)
+
+    def utilization(self):
+        """Share of each person's working time spent in meetings."""
+        working = np.count_nonzero(self.working)
+        if not working:
+            return np.zeros(len(self.busy))
+        return np.count_nonzero(self.busy & self.working, axis=(1, 2)) / working
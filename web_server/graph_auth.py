@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import msal
+import metrics
+from upstream import UpstreamError, env_float
+
+logger = logging.getLogger(__name__)
+
+# Refresh this many seconds before the access token expires
+REFRESH_MARGIN = env_float("GRAPH_TOKEN_REFRESH_MARGIN", 300)
+RETRY_DELAY = 30
+
+
+class GraphTokenManager:
+    """Process-wide MSAL session for Microsoft Graph.
+
+    Loads the token cache once, keeps the access token in memory, refreshes it
+    in the background shortly before it expires and writes the cache back to
+    disk only when MSAL reports a change. The ``/me`` profile is kept once known.
+    A ``static_token`` (e.g. for the load-test stand-ins) bypasses MSAL entirely.
+
+    Tokens are only ever acquired silently. Signing in is a separate step:
+    ``start_device_flow()`` returns the code for the user to enter and waits
+    for them in the background, so no request blocks on it.
+    """
+
+    def __init__(self, client_id, authority, scopes, cache_file, static_token=None):
+        self.client_id = client_id
+        self.authority = authority
+        self.scopes = scopes
+        self.cache_file = cache_file
+        self.token_cache = msal.SerializableTokenCache()
+        self.app = None
+        self._init_lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0
+        self._profile = None
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+        self._flow = None
+        self._flow_task = None
+        self.static_token = static_token
+
+    def _application(self):
+        # Built on first use (in a worker thread): MSAL resolves the authority over the network
+        with self._init_lock:
+            if self.app is not None:
+                return self.app
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r") as f:
+                    self.token_cache.deserialize(f.read())
+            self.app = msal.PublicClientApplication(self.client_id, authority=self.authority, token_cache=self.token_cache)
+        return self.app
+
+    def _has_account(self):
+        return bool(self._application().get_accounts())
+
+    def _save_cache(self):
+        if self.token_cache.has_state_changed:
+            with open(self.cache_file, "w") as f:
+                f.write(self.token_cache.serialize())
+
+    def _acquire(self, force_refresh=False):
+        app = self._application()
+        accounts = app.get_accounts()
+        if not accounts:
+            raise UpstreamError(401, "Not signed in to Microsoft Graph; sign in with POST /api/auth/graph/device")
+        result = app.acquire_token_silent(self.scopes, account=accounts[0], force_refresh=force_refresh)
+        if not result:
+            raise UpstreamError(401, "Silent token refresh failed; sign in again with POST /api/auth/graph/device")
+        self._save_cache()
+        if "access_token" not in result:
+            raise UpstreamError(401, result.get("error_description", "Token acquisition failed"))
+        return result
+
+    def _accept(self, result):
+        self._token = result["access_token"]
+        self._expires_at = time.time() + int(result.get("expires_in", 3600))
+
+    async def _renew(self, force_refresh=False):
+        try:
+            with metrics.timed("msal", "acquire_token"):
+                result = await asyncio.to_thread(self._acquire, force_refresh)
+        except UpstreamError:
+            raise
+        except Exception as e:
+            # Authority discovery and token calls fail with requests/MSAL errors when the login host is unreachable
+            raise UpstreamError(502, f"Microsoft sign-in failed: {e}")
+        self._accept(result)
+
+    def _initiate_device_flow(self):
+        flow = self._application().initiate_device_flow(scopes=self.scopes)
+        if "user_code" not in flow:
+            raise UpstreamError(502, flow.get("error_description", "Failed to initiate device flow"))
+        return flow
+
+    def _complete_device_flow(self, flow):
+        result = self._application().acquire_token_by_device_flow(flow)
+        self._save_cache()
+        return result
+
+    async def _wait_for_sign_in(self, flow):
+        try:
+            result = await asyncio.to_thread(self._complete_device_flow, flow)
+            if "access_token" in result:
+                self._accept(result)
+                logger.info("Signed in to Microsoft Graph")
+            else:
+                logger.warning("Device flow sign-in failed: %s", result.get("error_description", result.get("error")))
+        except Exception as e:
+            logger.warning("Device flow sign-in failed: %s", e)
+        finally:
+            self._flow = None
+
+    async def start_device_flow(self):
+        """Start signing in (or join the sign-in already waiting) and return the device flow for the user.
+
+        The flow holds ``user_code``, ``verification_uri``, ``expires_at`` and
+        ``message``. The token is picked up in the background once the user
+        has entered the code; the lock used for silent renewals is not held.
+        """
+        if self._flow is not None and self._flow["expires_at"] > time.time():
+            return self._flow
+        try:
+            with metrics.timed("msal", "initiate_device_flow"):
+                flow = await asyncio.to_thread(self._initiate_device_flow)
+        except UpstreamError:
+            raise
+        except Exception as e:
+            raise UpstreamError(502, f"Microsoft sign-in failed: {e}")
+        self._flow = flow
+        self._flow_task = asyncio.create_task(self._wait_for_sign_in(flow))
+        return flow
+
+    async def get_token(self):
+        if self.static_token:
+            return self.static_token
+        if self._token and time.time() < self._expires_at - REFRESH_MARGIN / 2:
+            return self._token
+        async with self._lock:
+            if not self._token or time.time() >= self._expires_at - REFRESH_MARGIN / 2:
+                await self._renew()
+        return self._token
+
+    async def has_session(self):
+        """Whether a token can be had without the interactive device flow."""
+        if self.static_token or self._token:
+            return True
+        try:
+            return await asyncio.to_thread(self._has_account)
+        except Exception:
+            return False
+
+    async def headers(self):
+        return {"Authorization": f"Bearer {await self.get_token()}"}
+
+    @property
+    def cached_profile(self):
+        return self._profile
+
+    def remember_profile(self, profile):
+        self._profile = profile
+
+    async def _refresh_loop(self):
+        retry_at = 0
+        while True:
+            refresh_at = max(self._expires_at - REFRESH_MARGIN, retry_at)
+            await asyncio.sleep(max(refresh_at - time.time(), 0))
+            try:
+                has_account = await asyncio.to_thread(self._has_account)
+            except Exception as e:
+                logger.warning("Graph token manager unavailable: %s", e)
+                has_account = False
+            if not has_account:
+                # Nobody has signed in yet; see start_device_flow()
+                retry_at = time.time() + RETRY_DELAY
+                continue
+            try:
+                async with self._lock:
+                    await self._renew(force_refresh=bool(self._token))
+                retry_at = 0
+            except Exception as e:
+                logger.warning("Graph token refresh failed: %s", e)
+                retry_at = time.time() + RETRY_DELAY
+
+    def start(self):
+        if self._refresh_task is None and not self.static_token:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._flow is not None:
+            # MSAL stops polling for the device flow once it has expired
+            self._flow["expires_at"] = 0
+        if self._flow_task is not None:
+            self._flow_task.cancel()
+            self._flow_task = None
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
@@ -0,0 +1,154 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlencode
+import httpx
+from upstream import UpstreamError, transport_error
+
+logger = logging.getLogger(__name__)
+
+GRAPH_PREFIX = os.getenv("GRAPH_URL", "https://graph.microsoft.com/v1.0")
+# Only what format_event reads
+EVENT_FIELDS = ["subject", "start", "end", "location", "organizer", "attendees"]
+PAGE_SIZE = 100
+# "delta" (calendarView/delta), "batch" ($select'ed calendarView) or "legacy" (three sequential calls)
+CALENDAR_MODE = os.getenv("GRAPH_CALENDAR_MODE", "delta")
+
+
+def query(params):
+    return urlencode(params, safe="$:,", quote_via=quote)
+
+
+def relative(url):
+    return url[len(GRAPH_PREFIX):] if url.startswith(GRAPH_PREFIX) else url
+
+
+def project(event):
+    return {field: event[field] for field in ["id", *EVENT_FIELDS] if field in event}
+
+
+class CalendarFetcher:
+    """Fetches today's events with as few Graph round trips as possible.
+
+    ``/me`` (when the profile is not known yet) and today's calendar view go
+    out as one ``$batch``; ``@odata.nextLink`` pages are followed individually. In ``delta`` mode today's view is a
+    ``calendarView/delta`` query whose ``deltaLink`` is replayed on later
+    polls, so only changed events are transferred after the first fetch.
+    """
+
+    def __init__(self, mode=CALENDAR_MODE):
+        self.mode = mode
+        self.delta_link = None
+        self.delta_window = None
+        self.delta_events = {}
+        self.last_stats = {}
+        self._requests = 0
+        self._bytes = 0
+
+    async def _send(self, graph, method, url, **kwargs):
+        response = await graph.request(method, url, **kwargs)
+        self._requests += 1
+        self._bytes += len(response.content)
+        return response
+
+    async def _follow(self, graph, headers, body):
+        values = list(body.get("value", []))
+        next_link = body.get("@odata.nextLink")
+        while next_link:
+            response = await self._send(graph, "GET", next_link, headers=headers)
+            if response.status_code != 200:
+                raise UpstreamError(response.status_code, response.text)
+            body = response.json()
+            values.extend(body.get("value", []))
+            next_link = body.get("@odata.nextLink")
+        return values, body.get("@odata.deltaLink")
+
+    def _today_url(self, window):
+        start, end = window
+        if self.mode == "delta":
+            if self.delta_link and self.delta_window == window:
+                return relative(self.delta_link)
+            # calendarView/delta does not accept $select; events are projected on arrival
+            return "/me/calendarView/delta?" + query({"startDateTime": start, "endDateTime": end})
+        return "/me/calendar/calendarView?" + query({"startDateTime": start, "endDateTime": end, "$select": ",".join(EVENT_FIELDS), "$top": PAGE_SIZE})
+
+    def _merge_delta(self, window, values, delta_link):
+        if self.delta_window != window or not self.delta_link:
+            self.delta_events = {}
+        for event in values:
+            if "@removed" in event:
+                self.delta_events.pop(event.get("id"), None)
+            else:
+                self.delta_events[event.get("id")] = project(event)
+        self.delta_window = window
+        self.delta_link = delta_link
+        return sorted(self.delta_events.values(), key=lambda event: event.get("start", {}).get("dateTime", ""))
+
+    async def _fetch_batch(self, graph, headers, window, profile):
+        requests = []
+        if profile is None:
+            requests.append({"id": "me", "method": "GET", "url": "/me?$select=mail,displayName"})
+        requests.append({"id": "today", "method": "GET", "url": self._today_url(window)})
+
+        response = await self._send(graph, "POST", "/$batch", json={"requests": requests}, headers=headers, retry=True)
+        if response.status_code != 200:
+            raise UpstreamError(response.status_code, response.text)
+        results = {item["id"]: item for item in response.json().get("responses", [])}
+
+        today = results.get("today", {})
+        if self.mode == "delta" and today.get("status") == 410 and self.delta_link:
+            # Delta token expired: start a fresh sync
+            self.delta_link = None
+            return await self._fetch_batch(graph, headers, window, profile)
+        for item in results.values():
+            if item.get("status", 500) >= 400:
+                raise UpstreamError(item.get("status", 500), str(item.get("body")))
+
+        if profile is None:
+            profile = results["me"].get("body", {})
+        events_today, delta_link = await self._follow(graph, headers, today.get("body", {}))
+        if self.mode == "delta":
+            events_today = self._merge_delta(window, events_today, delta_link)
+        return profile, events_today
+
+    async def _fetch_legacy(self, graph, headers, window, profile):
+        # The original three calls, including the recent-events query whose result was never used
+        if profile is None:
+            profile = (await self._send(graph, "GET", "/me", headers=headers)).json()
+        start, end = window
+        recent_since = (datetime.utcnow() - timedelta(hours=24)).isoformat() + "Z"
+        response_today = await self._send(graph, "GET", "/me/calendar/calendarView", params={"startDateTime": start, "endDateTime": end}, headers=headers)
+        events_today = response_today.json().get("value", [])
+        await self._send(graph, "GET", "/me/events", params={"$filter": f"createdDateTime ge {recent_since}"}, headers=headers)
+        return profile, events_today
+
+    async def fetch_event(self, graph, headers, event_id):
+        """One event by id, projected like the calendar view; ``None`` if it no longer exists."""
+        try:
+            response = await self._send(graph, "GET", f"/me/events/{quote(event_id, safe='')}?" + query({"$select": ",".join(EVENT_FIELDS)}), headers=headers)
+        except httpx.HTTPError as e:
+            raise transport_error(e)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise UpstreamError(response.status_code, response.text)
+        return project(response.json())
+
+    async def fetch(self, graph, headers, window, profile=None):
+        """Return ``(profile, events_today)``; ``window`` is today's (start, end) in UTC."""
+        self._requests = self._bytes = 0
+        started = time.perf_counter()
+        fetch = self._fetch_legacy if self.mode == "legacy" else self._fetch_batch
+        try:
+            result = await fetch(graph, headers, window, profile)
+        except httpx.HTTPError as e:
+            raise transport_error(e)
+        self.last_stats = {
+            "mode": self.mode,
+            "requests": self._requests,
+            "bytes": self._bytes,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        logger.info("Graph calendar fetch: %(mode)s, %(requests)d requests, %(bytes)d bytes, %(elapsed_ms).0f ms", self.last_stats)
+        return result
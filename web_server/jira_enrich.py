@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import re
+import httpx
+from upstream import UpstreamError, env_int
+
+logger = logging.getLogger(__name__)
+
+JIRA_KEY_PATTERN = re.compile(r'^[A-Z][A-Z0-9_]*-\d+$')
+JQL_MAX_LENGTH = env_int("JIRA_JQL_MAX_LENGTH", 2000)
+JQL_MAX_KEYS = env_int("JIRA_JQL_MAX_KEYS", 100)
+ENRICH_FIELDS = ["labels", "duedate"]
+
+
+def normalize_keys(keys):
+    # Upper-case, strip and de-duplicate while keeping first-seen order
+    return list(dict.fromkeys(k.strip().upper() for k in keys if k and k.strip()))
+
+
+def chunk_keys(keys, max_length=JQL_MAX_LENGTH, max_keys=JQL_MAX_KEYS):
+    base = len('key in ()')
+    chunks, current, length = [], [], base
+    for key in keys:
+        cost = len(key) + 4  # quotes plus ", " separator
+        if current and (length + cost > max_length or len(current) >= max_keys):
+            chunks.append(current)
+            current, length = [], base
+        current.append(key)
+        length += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _search_keys(jira, keys, fields):
+    jql = "key in (" + ", ".join(f'"{key}"' for key in keys) + ")"
+    body = {"jql": jql, "fields": fields, "maxResults": len(keys), "validateQuery": False}
+    # A read-only search, so safe to retry although it is a POST
+    response = await jira.post("/rest/api/2/search", json=body, retry=True)
+    response.raise_for_status()
+    return response.json().get('issues', [])
+
+
+async def fetch_issue_fields(jira, keys, fields=ENRICH_FIELDS):
+    """Resolve many Jira keys with one `key in (...)` search per chunk.
+
+    Returns ``(found, stats)`` where ``found`` maps upper-cased issue key to
+    its ``fields`` dict and ``stats`` counts requested, resolved and missed keys.
+    """
+    unique = normalize_keys(keys)
+    valid = [key for key in unique if JIRA_KEY_PATTERN.match(key)]
+    chunks = chunk_keys(valid)
+    results = await asyncio.gather(*(_search_keys(jira, chunk, fields) for chunk in chunks), return_exceptions=True)
+
+    found = {}
+    for chunk, result in zip(chunks, results):
+        if isinstance(result, (httpx.HTTPError, UpstreamError, ValueError)):
+            logger.warning("Jira batch lookup of %d keys failed: %s", len(chunk), result)
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        for issue in result:
+            found[issue['key'].upper()] = issue.get('fields', {})
+
+    resolved = sum(1 for key in unique if key in found)
+    stats = {"requested": len(unique), "resolved": resolved, "missed": len(unique) - resolved}
+    logger.info("Jira enrichment: %(resolved)d of %(requested)d keys resolved, %(missed)d missed", stats)
+    return found, stats
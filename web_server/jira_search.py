@@ -0,0 +1,47 @@
+import asyncio
+import httpx
+from upstream import UpstreamError, env_int, transport_error
+
+PAGE_SIZE = env_int("JIRA_PAGE_SIZE", 100)
+PAGE_CONCURRENCY = env_int("JIRA_PAGE_CONCURRENCY", 4)
+
+
+async def _search_page(jira, jql, fields, start_at, max_results):
+    params = {"jql": jql, "fields": ",".join(fields), "startAt": start_at, "maxResults": max_results}
+    try:
+        response = await jira.get("/rest/api/2/search", params=params)
+    except httpx.HTTPError as e:
+        raise transport_error(e)
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code, response.text)
+    return response.json()
+
+
+async def iter_search_pages(jira, jql, fields, page_size=PAGE_SIZE, concurrency=PAGE_CONCURRENCY):
+    """Yield the raw issue list of each search page in order.
+
+    The first page is fetched alone to learn ``total`` and the page size the
+    server actually honours; the remaining pages are fetched concurrently,
+    at most ``concurrency`` at a time, so memory stays bounded by the window.
+    """
+    first = await _search_page(jira, jql, fields, 0, page_size)
+    yield first.get('issues', [])
+
+    total = first.get('total', 0)
+    step = first.get('maxResults') or page_size
+    offsets = iter(range(step, total, step))
+    window = []
+    for start_at in offsets:
+        window.append(asyncio.create_task(_search_page(jira, jql, fields, start_at, step)))
+        if len(window) >= concurrency:
+            break
+    try:
+        while window:
+            page = await window.pop(0)
+            next_start = next(offsets, None)
+            if next_start is not None:
+                window.append(asyncio.create_task(_search_page(jira, jql, fields, next_start, step)))
+            yield page.get('issues', [])
+    finally:
+        for task in window:
+            task.cancel()
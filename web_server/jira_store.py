@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+import httpx
+from jira_search import iter_search_pages
+from upstream import UpstreamError, env_float, transport_error
+
+logger = logging.getLogger(__name__)
+
+# Minutes added to every delta window to absorb clock skew between us and Jira
+SYNC_OVERLAP_MINUTES = 2
+FULL_SYNC_INTERVAL = env_float("JIRA_FULL_SYNC_INTERVAL", 24 * 3600)
+SYNC_FIELDS = ["updated", "resolution", "assignee"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (key TEXT PRIMARY KEY, updated TEXT, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class JiraStore:
+    """Local SQLite copy of the user's open Jira issues, kept current with delta queries.
+
+    The first sync (and one every ``FULL_SYNC_INTERVAL`` seconds) downloads the
+    full ``full_jql`` result. Later syncs only ask for issues whose ``updated``
+    is at or after the previous sync's high-water mark, including ones that were
+    resolved or reassigned since, which are then dropped from the store.
+    """
+
+    def __init__(self, path, full_jql, fields, project):
+        self.path = path
+        self.full_jql = full_jql
+        self.fields = list(fields) + [f for f in SYNC_FIELDS if f not in fields]
+        self.project = project
+        self._schema_ready = False
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        try:
+            if not self._schema_ready:
+                db.executescript(SCHEMA)
+                self._schema_ready = True
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _state(self):
+        with self._connect() as db:
+            return dict(db.execute("SELECT name, value FROM sync_state"))
+
+    def read_all(self):
+        with self._connect() as db:
+            rows = db.execute("SELECT data FROM issues ORDER BY updated DESC").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def _apply(self, upserts, removals, state, replace=False):
+        with self._connect() as db:
+            if replace:
+                db.execute("DELETE FROM issues")
+            db.executemany("INSERT OR REPLACE INTO issues (key, updated, data) VALUES (?, ?, ?)", upserts)
+            db.executemany("DELETE FROM issues WHERE key = ?", [(key,) for key in removals])
+            db.executemany("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", state.items())
+
+    async def _myself(self, jira, state):
+        if state.get("myself"):
+            return json.loads(state["myself"])
+        try:
+            response = await jira.get("/rest/api/2/myself")
+        except httpx.HTTPError as e:
+            raise transport_error(e)
+        if response.status_code != 200:
+            raise UpstreamError(response.status_code, response.text)
+        profile = response.json()
+        return {k: profile.get(k) for k in ("key", "name", "accountId") if profile.get(k)}
+
+    def _is_mine(self, issue, myself):
+        assignee = issue.get('fields', {}).get('assignee') or {}
+        return any(assignee.get(k) == v for k, v in myself.items())
+
+    async def apply_issue(self, jira, issue):
+        """Apply one pushed issue (e.g. from a webhook); returns whether it is still one of the user's open issues."""
+        state = await asyncio.to_thread(self._state)
+        myself = await self._myself(jira, state)
+        resolved = issue.get('fields', {}).get('resolution') is not None
+        if resolved or not self._is_mine(issue, myself):
+            await asyncio.to_thread(self._apply, [], [issue['key']], {"myself": json.dumps(myself)})
+            return False
+        await asyncio.to_thread(self._apply, [self._row(issue)], [], {"myself": json.dumps(myself)})
+        return True
+
+    async def remove_issue(self, key):
+        await asyncio.to_thread(self._apply, [], [key], {})
+
+    async def fetch_issue(self, jira, key):
+        """The issue as Jira has it now, with the synced fields; ``None`` if it no longer exists."""
+        try:
+            response = await jira.get(f"/rest/api/2/issue/{quote(key, safe='')}", params={"fields": ",".join(self.fields)})
+        except httpx.HTTPError as e:
+            raise transport_error(e)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise UpstreamError(response.status_code, response.text)
+        return response.json()
+
+    async def sync_issue(self, jira, key):
+        """Re-read one issue (e.g. named by a webhook) and apply it; returns it if it is still one of the user's open issues."""
+        issue = await self.fetch_issue(jira, key)
+        if issue is None:
+            await self.remove_issue(key)
+            return None
+        return issue if await self.apply_issue(jira, issue) else None
+
+    def _row(self, issue):
+        return issue['key'], issue.get('fields', {}).get('updated'), json.dumps(self.project(issue))
+
+    async def sync(self, jira):
+        """Bring the store up to date and return its issues, most recently updated first."""
+        state = await asyncio.to_thread(self._state)
+        started = time.time()
+        last_sync = float(state.get("last_sync", 0))
+        full = not last_sync or started - float(state.get("last_full_sync", 0)) > FULL_SYNC_INTERVAL
+
+        upserts, removals = [], []
+        if full:
+            async for issues in iter_search_pages(jira, self.full_jql, self.fields):
+                upserts.extend(self._row(issue) for issue in issues)
+            new_state = {"last_sync": started, "last_full_sync": started}
+        else:
+            myself = await self._myself(jira, state)
+            minutes = math.ceil((started - last_sync) / 60) + SYNC_OVERLAP_MINUTES
+            jql = f'assignee was currentUser() AND updated >= "-{minutes}m" ORDER BY updated ASC'
+            async for issues in iter_search_pages(jira, jql, self.fields):
+                for issue in issues:
+                    resolved = issue.get('fields', {}).get('resolution') is not None
+                    if resolved or not self._is_mine(issue, myself):
+                        removals.append(issue['key'])
+                    else:
+                        upserts.append(self._row(issue))
+            new_state = {"last_sync": started, "myself": json.dumps(myself)}
+
+        await asyncio.to_thread(self._apply, upserts, removals, new_state, full)
+        logger.info("Jira %s sync: %d upserted, %d removed", "full" if full else "delta", len(upserts), len(removals))
+        return await asyncio.to_thread(self.read_all)
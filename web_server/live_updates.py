@@ -0,0 +1,82 @@
+import asyncio
+import snapshots
+
+# Field identifying a record within each source's list
+RECORD_KEYS = {
+    snapshots.JIRA: "Issue Key",
+    snapshots.REVIEWS: "id",
+    snapshots.MEETINGS: "id",
+}
+QUEUE_SIZE = 256
+# Above this share of changed records a full "replace" is cheaper than patches
+REPLACE_RATIO = 0.5
+
+
+def remove(records, key_field, key):
+    return [record for record in records if record.get(key_field) != key]
+
+
+def diff(key_field, old, new):
+    """``(upserts, removed_keys)`` turning ``old`` into ``new``."""
+    old_by_key = {record.get(key_field): record for record in old}
+    upserts = [record for record in new if old_by_key.get(record.get(key_field)) != record]
+    new_keys = {record.get(key_field) for record in new}
+    removed = [key for key in old_by_key if key not in new_keys]
+    return upserts, removed
+
+
+class LiveUpdates:
+    """Fans snapshot changes out to connected dashboards as small patch events.
+
+    Registered as a ``SnapshotStore`` listener, so webhook patches, polls and
+    prefetches all reach the browser the same way. A list change becomes
+    ``upsert``/``remove`` events keyed by ``RECORD_KEYS``; the schedule, first
+    loads and large changes are sent as one ``replace``. A subscriber that
+    falls ``QUEUE_SIZE`` events behind is told to ``resync`` instead.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self.published = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"source": event["source"], "op": "resync"})
+
+    def on_snapshot(self, previous, snapshot):
+        if not self._subscribers:
+            return
+        source, records = snapshot.source, snapshot.data
+        key_field = RECORD_KEYS.get(source)
+        if key_field is None or previous is None:
+            self.publish({"source": source, "op": "replace", "version": snapshot.version, "records": records})
+            return
+        upserts, removed = diff(key_field, previous.data, records)
+        if len(upserts) + len(removed) > max(len(records), 1) * REPLACE_RATIO:
+            self.publish({"source": source, "op": "replace", "version": snapshot.version, "records": records})
+            return
+        for index, record in enumerate(upserts):
+            event = {"source": source, "op": "upsert", "version": snapshot.version, "key": record.get(key_field), "record": record}
+            if index == len(upserts) - 1:
+                # Keys in list order, sent once so the client can place new records
+                event["order"] = [record.get(key_field) for record in records]
+            self.publish(event)
+        for key in removed:
+            self.publish({"source": source, "op": "remove", "version": snapshot.version, "key": key})
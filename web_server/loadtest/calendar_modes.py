@@ -0,0 +1,82 @@
+"""Compare the ``GRAPH_CALENDAR_MODE`` fetch paths against the Graph stand-in.
+
+Starts the stand-ins, then polls today's calendar with each mode and reports
+Graph requests, response bytes and latency for the first poll and for the
+later ones (where ``delta`` only transfers changes). Run from ``web_server/``::
+
+    python -m loadtest.calendar_modes --polls 20 --size graph=50
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+from datetime import datetime
+
+import httpx
+
+import graph_calendar
+import upstream
+from graph_calendar import CalendarFetcher
+from loadtest.fake_upstreams import add_service_arguments, service_settings
+from loadtest.loadgen import percentile, wait_until_up
+
+MODES = ("legacy", "batch", "delta")
+HEADERS = {"Authorization": "Bearer stand-in"}
+
+
+async def poll(mode, graph, polls):
+    fetcher = CalendarFetcher(mode)
+    today = datetime.utcnow().date()
+    window = (datetime.combine(today, datetime.min.time()).isoformat() + "Z", datetime.combine(today, datetime.max.time()).isoformat() + "Z")
+    profile, stats = None, []
+    for _ in range(polls):
+        profile, _ = await fetcher.fetch(graph, HEADERS, window, profile)
+        stats.append(fetcher.last_stats)
+    return stats
+
+
+def summary(stats):
+    return {
+        "requests": sum(s["requests"] for s in stats) / len(stats),
+        "bytes": sum(s["bytes"] for s in stats) / len(stats),
+        "p50_ms": percentile([s["elapsed_ms"] for s in stats], 0.5),
+    }
+
+
+async def run(args):
+    graph = upstream.register("graph", f"{args.fakes}/v1.0")
+    # Delta links point at the stand-in, so they must be recognised as Graph URLs
+    graph_calendar.GRAPH_PREFIX = f"{args.fakes}/v1.0"
+    async with httpx.AsyncClient() as client:
+        settings = service_settings(args)
+        if settings:
+            await client.post(f"{args.fakes}/_config", json=settings)
+    print(f"{'mode':<8}{'first: reqs':>12}{'bytes':>10}{'ms':>8}{'later: reqs':>14}{'bytes':>10}{'p50 ms':>9}")
+    try:
+        for mode in MODES:
+            stats = await poll(mode, graph, args.polls)
+            first, later = summary(stats[:1]), summary(stats[1:] or stats[:1])
+            print(f"{mode:<8}{first['requests']:>12.0f}{first['bytes']:>10,.0f}{first['p50_ms']:>8.1f}"
+                  f"{later['requests']:>14.1f}{later['bytes']:>10,.0f}{later['p50_ms']:>9.1f}")
+    finally:
+        await upstream.close_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the Graph calendar fetch modes")
+    parser.add_argument("--polls", type=int, default=20, help="fetches per mode; the first one is reported separately")
+    parser.add_argument("--fakes-port", type=int, default=9100)
+    add_service_arguments(parser)
+    args = parser.parse_args(argv)
+    args.fakes = f"http://127.0.0.1:{args.fakes_port}"
+    fakes = subprocess.Popen([sys.executable, "-m", "loadtest.fake_upstreams", "--port", str(args.fakes_port)])
+    try:
+        wait_until_up(f"{args.fakes}/_stats", fakes)
+        asyncio.run(run(args))
+    finally:
+        fakes.terminate()
+        fakes.wait()
+
+
+if __name__ == "__main__":
+    main()
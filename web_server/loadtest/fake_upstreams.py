@@ -0,0 +1,357 @@
+"""Local stand-ins for Jira, Review Board, Microsoft Graph and Gemini.
+
+One server exposes all four under the path prefixes the app expects::
+
+    JIRA_URL=http://127.0.0.1:9000/jira
+    REVIEWBOARD_URL=http://127.0.0.1:9000/reviews
+    GRAPH_URL=http://127.0.0.1:9000/v1.0
+    GEMINI_API_ENDPOINT=http://127.0.0.1:9000
+
+Each service has a latency (plus jitter), a payload size and an error rate,
+set on the command line or at runtime with ``POST /_config``. ``GET /_stats``
+returns the number of calls per service and route.
+
+Run from ``web_server/``: ``python -m loadtest.fake_upstreams --port 9000``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from benchmarks.fixtures import ME, calendar_view, jira_search, review_request_list
+from scheduler import DAY_START, REVIEW_MINUTES, format_clock
+
+SERVICES = ("jira", "reviewboard", "graph", "gemini")
+KEY_IN = re.compile(r'"([A-Z][A-Z0-9]+-\d+)"')
+
+
+@dataclass
+class ServiceConfig:
+    latency_ms: float = 50
+    jitter_ms: float = 10
+    size: int = 200  # issues, review requests, calendar events or schedule items
+    error_rate: float = 0.0
+    error_status: int = 503  # e.g. 429 to simulate rate limiting
+    retry_after: float = 0.0  # seconds sent as Retry-After on injected failures (0 = no header)
+
+
+# Properties Graph returns when no $select is given (body and bodyPreview dominate the size)
+GRAPH_DEFAULT_PROPERTIES = {
+    "@odata.etag": 'W/"DwAAABYAAAB0ZXN0"',
+    "createdDateTime": "2025-09-01T08:00:00Z",
+    "lastModifiedDateTime": "2025-09-01T08:00:00Z",
+    "changeKey": "DwAAABYAAAB0ZXN0",
+    "categories": [],
+    "originalStartTimeZone": "UTC",
+    "originalEndTimeZone": "UTC",
+    "iCalUId": "040000008200E00074C5B7101A82E00800000000",
+    "reminderMinutesBeforeStart": 15,
+    "isReminderOn": True,
+    "hasAttachments": False,
+    "importance": "normal",
+    "sensitivity": "normal",
+    "isAllDay": False,
+    "isCancelled": False,
+    "isOrganizer": False,
+    "responseRequested": True,
+    "showAs": "busy",
+    "type": "singleInstance",
+    "webLink": "https://outlook.office365.com/owa/?itemid=AAMkAD&exvsurl=1&path=/calendar/item",
+    "onlineMeetingUrl": None,
+    "isOnlineMeeting": True,
+    "onlineMeetingProvider": "teamsForBusiness",
+    "responseStatus": {"response": "accepted", "time": "2025-09-01T08:05:00Z"},
+    "bodyPreview": "Join on your computer, mobile app or room device. Click here to join the meeting. " * 3,
+    "body": {"contentType": "html", "content": "<html><head><meta http-equiv=\"Content-Type\" content=\"text/html; charset=utf-8\"></head><body>" + "<div>Microsoft Teams meeting</div>" * 40 + "</body></html>"},
+    "onlineMeeting": {"joinUrl": "https://teams.microsoft.com/l/meetup-join/19%3ameeting_stand-in%40thread.v2/0"},
+}
+
+DEFAULTS = {
+    "jira": ServiceConfig(latency_ms=150, size=300),
+    "reviewboard": ServiceConfig(latency_ms=80, size=50),
+    "graph": ServiceConfig(latency_ms=100, size=15),
+    "gemini": ServiceConfig(latency_ms=3000, jitter_ms=500, size=12),
+}
+
+
+class FakeUpstreams:
+    def __init__(self, configs=None, seed=0):
+        self.configs = {name: ServiceConfig(**asdict(DEFAULTS[name])) for name in SERVICES}
+        self.calls = Counter()
+        self.rng = random.Random(seed)
+        self.version = 1
+        self._datasets = {}
+        for name, config in (configs or {}).items():
+            self.configure(name, **config)
+
+    def configure(self, service, **values):
+        config = self.configs[service]
+        for field, value in values.items():
+            setattr(config, field, type(getattr(config, field))(value))
+        # Payloads are regenerated lazily when their size changes
+        self._datasets.pop(service, None)
+        self.version += 1
+
+    def dataset(self, service):
+        size = self.configs[service].size
+        if service not in self._datasets:
+            if service == "jira":
+                data = jira_search(size)["issues"]
+            elif service == "reviewboard":
+                data = review_request_list(size)["review_requests"]
+            else:
+                data = calendar_view(size, day=datetime.now(timezone.utc).date())["value"]
+            self._datasets[service] = data
+        return self._datasets[service]
+
+    async def call(self, service, route):
+        """Count the call, wait the configured latency and return an error response if one is due."""
+        self.calls[f"{service} {route}"] += 1
+        config = self.configs[service]
+        delay = max(config.latency_ms + self.rng.uniform(-config.jitter_ms, config.jitter_ms), 0)
+        await asyncio.sleep(delay / 1000)
+        if self.rng.random() < config.error_rate:
+            return self.failure(service)
+        return None
+
+    def failure(self, service):
+        config = self.configs[service]
+        headers = {"Retry-After": f"{config.retry_after:g}"} if config.retry_after else None
+        return JSONResponse(status_code=config.error_status, content={"error": f"{service} stand-in: injected failure"}, headers=headers)
+
+    # Jira
+    def jira_search(self, jql, start_at, max_results):
+        issues = self.dataset("jira")
+        if "key in (" in jql:
+            wanted = set(KEY_IN.findall(jql))
+            matches = [issue for issue in issues if issue["key"] in wanted]
+            return {"startAt": 0, "maxResults": len(matches), "total": len(matches), "issues": matches}
+        if 'updated >= "-' in jql:
+            issues = []  # incremental syncs: nothing changed since the last poll
+        page = issues[start_at:start_at + max_results]
+        return {"startAt": start_at, "maxResults": max_results, "total": len(issues), "issues": page}
+
+    # Review Board
+    def review_requests(self, base_url, params):
+        requests = self.dataset("reviewboard")
+        if params.get("last-updated-from"):
+            requests = [r for r in requests if r["last_updated"] >= params["last-updated-from"]]
+        start, page_size = int(params.get("start", 0)), int(params.get("max-results", 25))
+        body = {"stat": "ok", "total_results": len(requests), "review_requests": requests[start:start + page_size], "links": {}}
+        if start + page_size < len(requests):
+            query = {**params, "start": start + page_size}
+            body["links"]["next"] = {"href": f"{base_url}/api/review-requests/?" + "&".join(f"{k}={v}" for k, v in query.items())}
+        return body
+
+    # Graph
+    @staticmethod
+    def graph_events(events, params):
+        """Events as Graph returns them: only the ``$select``ed properties, or every default one."""
+        if "$select" in params:
+            fields = ["id", *params["$select"].split(",")]
+            return [{field: event[field] for field in fields if field in event} for event in events]
+        return [{**event, **GRAPH_DEFAULT_PROPERTIES} for event in events]
+
+    def graph(self, base_url, path, params):
+        """``(status, body)`` for a Graph GET, shared by direct calls and ``$batch`` sub-requests."""
+        events = self.graph_events(self.dataset("graph"), params)
+        if path == "/me":
+            return 200, {"mail": ME["emailAddress"], "displayName": ME["displayName"]}
+        if path == "/me/calendarView/delta":
+            if "$deltatoken" in params:
+                if params["$deltatoken"] != str(self.version):
+                    return 410, {"error": {"code": "SyncStateNotFound"}}
+                events = []  # nothing changed since the last poll
+            return 200, {"value": events, "@odata.deltaLink": f"{base_url}/me/calendarView/delta?$deltatoken={self.version}"}
+        if path in ("/me/calendar/calendarView", "/me/calendarView"):
+            return 200, {"value": events}
+        if path == "/me/events":
+            return 200, {"value": events[: max(len(events) // 5, 1)]}
+        if path.startswith("/me/events/"):
+            event_id = path.rsplit("/", 1)[1]
+            for event in events:
+                if event["id"] == event_id:
+                    return 200, event
+        return 404, {"error": {"code": "ResourceNotFound"}}
+
+    # Gemini
+    def schedule_text(self):
+        items = []
+        for index in range(self.configs["gemini"].size):
+            start = DAY_START + index * REVIEW_MINUTES
+            items.append({
+                "start_time": format_clock(start),
+                "end_time": format_clock(start + REVIEW_MINUTES),
+                "task_type": "Review",
+                "summary": f"Stand-in review {index}",
+                "task_id": 45000 + index,
+                "due_date": "2025-09-16",
+            })
+        return "```json\n" + json.dumps(items, indent=2) + "\n```"
+
+    @staticmethod
+    def gemini_response(text, prompt_chars):
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": prompt_chars // 4, "candidatesTokenCount": len(text) // 4, "totalTokenCount": (prompt_chars + len(text)) // 4},
+        }
+
+
+def create_app(fakes):
+    app = FastAPI()
+
+    @app.get("/_stats")
+    async def stats():
+        return {"calls": dict(fakes.calls), "config": {name: asdict(config) for name, config in fakes.configs.items()}}
+
+    @app.post("/_stats/reset")
+    async def reset_stats():
+        fakes.calls.clear()
+        return {"calls": {}}
+
+    @app.post("/_config")
+    async def configure(request: Request):
+        for service, values in (await request.json()).items():
+            fakes.configure(service, **values)
+        return {name: asdict(config) for name, config in fakes.configs.items()}
+
+    @app.get("/jira/rest/api/2/search")
+    async def jira_search_get(jql: str = "", startAt: int = 0, maxResults: int = 50):
+        return await fakes.call("jira", "GET /search") or fakes.jira_search(jql, startAt, maxResults)
+
+    @app.post("/jira/rest/api/2/search")
+    async def jira_search_post(request: Request):
+        body = await request.json()
+        return await fakes.call("jira", "POST /search") or fakes.jira_search(body.get("jql", ""), body.get("startAt", 0), body.get("maxResults", 50))
+
+    @app.get("/jira/rest/api/2/myself")
+    async def jira_myself():
+        return await fakes.call("jira", "GET /myself") or ME
+
+    @app.get("/jira/rest/api/2/issue/{key}")
+    async def jira_issue_get(key: str):
+        error = await fakes.call("jira", "GET /issue")
+        if error:
+            return error
+        for issue in fakes.dataset("jira"):
+            if issue["key"] == key or issue["id"] == key:
+                return issue
+        return JSONResponse(status_code=404, content={"errorMessages": ["Issue Does Not Exist"]})
+
+    @app.get("/reviews/api/session/")
+    async def reviewboard_session():
+        return await fakes.call("reviewboard", "GET /session") or {"stat": "ok", "session": {"authenticated": True, "links": {"user": {"title": ME["name"]}}}}
+
+    @app.get("/reviews/api/review-requests/")
+    async def reviewboard_list(request: Request):
+        error = await fakes.call("reviewboard", "GET /review-requests")
+        if error:
+            return error
+        etag = f'"{fakes.version}-{request.url.query}"'
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status_code=304)
+        base_url = str(request.base_url).rstrip("/") + "/reviews"
+        return JSONResponse(fakes.review_requests(base_url, dict(request.query_params)), headers={"ETag": etag})
+
+    @app.post("/v1.0/$batch")
+    async def graph_batch(request: Request):
+        error = await fakes.call("graph", "POST /$batch")
+        if error:
+            return error
+        base_url = str(request.base_url).rstrip("/") + "/v1.0"
+        responses = []
+        for sub in (await request.json()).get("requests", []):
+            url = urlsplit(sub["url"])
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            status, body = fakes.graph(base_url, url.path, params)
+            responses.append({"id": sub["id"], "status": status, "body": body})
+        return {"responses": responses}
+
+    @app.get("/v1.0/{path:path}")
+    async def graph_get(path: str, request: Request):
+        error = await fakes.call("graph", f"GET /{path}")
+        if error:
+            return error
+        base_url = str(request.base_url).rstrip("/") + "/v1.0"
+        status, body = fakes.graph(base_url, "/" + path, dict(request.query_params))
+        return JSONResponse(status_code=status, content=body)
+
+    @app.post("/v1beta/models/{model_action}")
+    async def gemini_generate(model_action: str, request: Request):
+        prompt_chars = len(await request.body())
+        config = fakes.configs["gemini"]
+        if not model_action.endswith(":streamGenerateContent"):
+            return await fakes.call("gemini", "generateContent") or fakes.gemini_response(fakes.schedule_text(), prompt_chars)
+
+        # Streaming: the latency is spread over the chunks, so the first one arrives early
+        fakes.calls["gemini streamGenerateContent"] += 1
+        if fakes.rng.random() < config.error_rate:
+            return fakes.failure("gemini")
+        text = fakes.schedule_text()
+        chunk_count = max(config.size, 1)
+        step = -(-len(text) // chunk_count)
+        pieces = [text[i:i + step] for i in range(0, len(text), step)]
+
+        async def chunks():
+            # REST streaming is a JSON array of GenerateContentResponse objects
+            for index, piece in enumerate(pieces):
+                await asyncio.sleep(max(config.latency_ms + fakes.rng.uniform(-config.jitter_ms, config.jitter_ms), 0) / 1000 / len(pieces))
+                yield ("[" if index == 0 else ",\n") + json.dumps(fakes.gemini_response(piece, prompt_chars))
+            yield "]"
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    return app
+
+
+def parse_settings(values, field, settings):
+    """Fold ``service=value`` arguments into ``settings[service][field]``."""
+    for value in values or []:
+        service, _, number = value.partition("=")
+        if service not in SERVICES:
+            raise SystemExit(f"Unknown service {service!r}; expected one of {', '.join(SERVICES)}")
+        settings.setdefault(service, {})[field] = float(number)
+    return settings
+
+
+def add_service_arguments(parser):
+    parser.add_argument("--latency", action="append", metavar="SERVICE=MS", help="mean latency per call, e.g. jira=200")
+    parser.add_argument("--jitter", action="append", metavar="SERVICE=MS", help="uniform +/- jitter per call")
+    parser.add_argument("--size", action="append", metavar="SERVICE=N", help="records returned, e.g. jira=5000")
+    parser.add_argument("--errors", action="append", metavar="SERVICE=RATE", help="fraction of calls failing, e.g. graph=0.05")
+    parser.add_argument("--error-status", action="append", metavar="SERVICE=CODE", help="status of injected failures (default 503), e.g. jira=429")
+    parser.add_argument("--retry-after", action="append", metavar="SERVICE=SECONDS", help="Retry-After sent with injected failures")
+
+
+def service_settings(args):
+    settings = {}
+    parse_settings(args.latency, "latency_ms", settings)
+    parse_settings(args.jitter, "jitter_ms", settings)
+    parse_settings(args.size, "size", settings)
+    parse_settings(args.errors, "error_rate", settings)
+    parse_settings(args.error_status, "error_status", settings)
+    parse_settings(args.retry_after, "retry_after", settings)
+    return settings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Jira, Review Board, Graph and Gemini servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--seed", type=int, default=0)
+    add_service_arguments(parser)
+    args = parser.parse_args(argv)
+    app = create_app(FakeUpstreams(service_settings(args), seed=args.seed))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
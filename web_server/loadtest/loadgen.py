@@ -0,0 +1,200 @@
+"""Async load generator for the ``/api/*`` endpoints.
+
+Drives each endpoint in turn at a fixed concurrency and reports latency
+percentiles, throughput, errors and the upstream calls it caused (read from
+the stand-ins' ``/_stats``). With ``--spawn`` it starts the stand-ins and the
+app itself, wired together through environment variables, so the whole run
+needs no network. Run from ``web_server/``::
+
+    python -m loadtest.loadgen --spawn --concurrency 20 --duration 10
+    python -m loadtest.loadgen --spawn --size jira=5000 --latency gemini=500 --errors graph=0.05
+    python -m loadtest.loadgen --spawn --users 50 --endpoints /api/team/ --fresh
+    python -m loadtest.loadgen --target http://127.0.0.1:8000 --fakes http://127.0.0.1:9000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+import orjson
+
+from loadtest.fake_upstreams import add_service_arguments, service_settings
+
+DEFAULT_ENDPOINTS = [
+    "/api/jira/",
+    "/api/review-board/",
+    "/api/meetings/",
+    "/api/taskscheduler/",
+    "/api/dashboard/",
+]
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def drive(client, url, concurrency, duration, max_requests):
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                await response.aread()
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "statuses": dict(statuses),
+    }
+
+
+async def upstream_calls(client, fakes):
+    if not fakes:
+        return Counter()
+    try:
+        response = await client.get(f"{fakes}/_stats")
+        return Counter(response.json()["calls"])
+    except (httpx.HTTPError, ValueError, KeyError):
+        return Counter()
+
+
+def report(results):
+    header = f"{'endpoint':<40}{'reqs':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}  upstream calls"
+    print(header)
+    print("-" * (len(header) + 20))
+    for endpoint, r in results.items():
+        calls = ", ".join(f"{route}={count}" for route, count in sorted(r["upstream"].items())) or "-"
+        print(f"{endpoint:<40}{r['requests']:>7}{r['errors']:>8}{r['rps']:>9.1f}{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}  {calls}")
+
+
+async def run(args):
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {args.api_key}"} if args.api_key else None
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits, headers=headers) as client:
+        settings = service_settings(args)
+        if settings and args.fakes:
+            await client.post(f"{args.fakes}/_config", json=settings)
+        for endpoint in args.endpoints.split(","):
+            url = endpoint + ("&" if "?" in endpoint else "?") + "fresh=true" if args.fresh else endpoint
+            before = await upstream_calls(client, args.fakes)
+            result = await drive(client, url, args.concurrency, args.duration, args.requests)
+            result["upstream"] = await upstream_calls(client, args.fakes) - before
+            results[endpoint] = result
+    report(results)
+    return results
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{url} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not start within {timeout}s")
+
+
+def spawn(args):
+    """Start the stand-ins and the app on local ports; returns the processes to stop afterwards."""
+    fakes_url = f"http://127.0.0.1:{args.fakes_port}"
+    target_url = f"http://127.0.0.1:{args.app_port}"
+    workdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    scratch = tempfile.mkdtemp(prefix="taskit-loadtest-")
+    users_file = os.path.join(scratch, "users.json")
+    # Extra users with their own stand-in tokens, all in the default user's team for the team view
+    with open(users_file, "wb") as f:
+        f.write(orjson.dumps({
+            f"user{n}": {"jira_token": f"stand-in-{n}", "reviewboard_token": f"stand-in-{n}", "graph_token": f"stand-in-{n}",
+                         "api_key": f"stand-in-{n}", "team": "loadtest"}
+            for n in range(1, args.users + 1)
+        }))
+    env = {
+        **os.environ,
+        "JIRA_URL": f"{fakes_url}/jira",
+        "REVIEWBOARD_URL": f"{fakes_url}/reviews",
+        "GRAPH_URL": f"{fakes_url}/v1.0",
+        "GEMINI_API_ENDPOINT": fakes_url,
+        "GRAPH_ACCESS_TOKEN": "stand-in",
+        "GOOGLE_API_KEY": "stand-in",
+        "JIRA_API_TOKEN": "stand-in",
+        "REVIEW_BOARD_API_TOKEN": "stand-in",
+        "JIRA_STORE_PATH": os.path.join(scratch, "jira_store.db"),
+        "PERSISTENT_CACHE_PATH": os.path.join(scratch, "taskit_cache.db"),
+        "USERS_FILE": users_file,
+        "API_KEY": args.api_key,
+        "TEAM_NAME": "loadtest",
+        # Background refreshes would blur the per-endpoint upstream call counts
+        "PREFETCH_ENABLED": "1" if args.prefetch else "0",
+    }
+    fakes = subprocess.Popen([sys.executable, "-m", "loadtest.fake_upstreams", "--port", str(args.fakes_port)], cwd=workdir, env=env)
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning", "--workers", str(args.workers)],
+        cwd=workdir, env=env,
+    )
+    wait_until_up(f"{fakes_url}/_stats", fakes)
+    wait_until_up(f"{target_url}/api/cache/stats", app)
+    args.target, args.fakes = target_url, fakes_url
+    return [app, fakes]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the TaskIT API")
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="base URL of the app")
+    parser.add_argument("--fakes", default="http://127.0.0.1:9000", help="base URL of the stand-ins, for upstream call counts ('' to skip)")
+    parser.add_argument("--endpoints", default=",".join(DEFAULT_ENDPOINTS), help="comma-separated paths, driven one after another")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight per endpoint")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--requests", type=int, default=0, help="stop each endpoint after this many requests (0 = duration only)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--api-key", default=os.getenv("TASKIT_API_KEY", "stand-in"), help="API key sent as a bearer token (the spawned app's default user gets it)")
+    parser.add_argument("--fresh", action="store_true", help="add fresh=true to bypass the response caches")
+    parser.add_argument("--spawn", action="store_true", help="start the stand-ins and the app locally")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--fakes-port", type=int, default=9100)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when spawning the app")
+    parser.add_argument("--prefetch", action="store_true", help="keep the spawned app's background prefetch on")
+    parser.add_argument("--users", type=int, default=0, help="extra users (user1..userN) configured in the spawned app")
+    add_service_arguments(parser)
+    args = parser.parse_args(argv)
+
+    processes = spawn(args) if args.spawn else []
+    try:
+        asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
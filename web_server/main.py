@@ -1,42 +1,59 @@
 from fastapi.middleware.cors import CORSMiddleware 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-import requests
+from fastapi import BackgroundTasks, FastAPI, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import hmac
+import math
 import os
 import re
 from dotenv import load_dotenv
 import json
-from datetime import datetime, timezone, timedelta
+import orjson
+import logging
+import time
+from datetime import datetime, timezone
 from tzlocal import get_localzone
-import msal
 import google.generativeai as genai
+import metrics
+import upstream
+from upstream import CircuitOpenError, UpstreamError
+from cache import FALLBACK, TTLCache
+from reviewboard_sync import ReviewBoardSync
+from graph_auth import GraphTokenManager
+import snapshots
+from snapshots import SnapshotStore
+from schedule_cache import ScheduleCache, input_key
+from persistent_cache import PersistentCache
+from singleflight import SingleFlight
+from prefetch import Prefetcher, PrefetchJob
+from schedule_stream import JSONArrayStream, sse_event
+from live_updates import remove
+from prompt_encoder import encode_inputs, estimate_tokens
+from jira_search import iter_search_pages
+from jira_store import JiraStore
+from records import ORJSONResponse, extract_calendar_event, extract_jira_issue, extract_review_request
+from scheduler import build_schedule, parse_clock
+from freebusy import FreeBusy
+from users import DEFAULT_USER, UserDirectory, UserSession, load_credentials
 
 
 
 load_dotenv()
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # or restrict to your frontend domain
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+logger = logging.getLogger(__name__)
 
 # JIRA Configuration
-jira_url = "https://ipo-jira.rbbn.com/jira"
+jira_url = os.getenv("JIRA_URL", "https://ipo-jira.rbbn.com/jira")
 jira_api_token = os.getenv("JIRA_API_TOKEN")
 jira_headers = {
-    "Authorization": f"Bearer {jira_api_token}",
     "Content-Type": "application/json"
 }
 
 # Review Board Configuration
-REVIEWBOARD_DOMAIN = "http://revbrd01.ecitele.com/reviews"
+REVIEWBOARD_DOMAIN = os.getenv("REVIEWBOARD_URL", "http://revbrd01.ecitele.com/reviews")
 reviewboard_api_token = os.getenv("REVIEW_BOARD_API_TOKEN")
 reviewboard_headers = {
-    "Authorization": f"token {reviewboard_api_token}",
     "Accept": "application/json"
 }
 
@@ -47,206 +64,416 @@ AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
 SCOPES = ['Calendars.Read']
 CACHE_FILE = "token_cache.json"
 GEMINI_API=os.getenv("GOOGLE_API_KEY")
+# Alternative Gemini REST endpoint (e.g. the load-test stand-in); the default uses Google's gRPC API
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+GRAPH_URL = os.getenv("GRAPH_URL", "https://graph.microsoft.com/v1.0")
+SCHEDULER_ENGINES = ("llm", "local")  # Gemini, or the rules in scheduler.py
+SCHEDULER_ENGINE = os.getenv("SCHEDULER_ENGINE", "llm")
+if SCHEDULER_ENGINE not in SCHEDULER_ENGINES:
+    raise ValueError(f"SCHEDULER_ENGINE must be one of {', '.join(SCHEDULER_ENGINES)}, not {SCHEDULER_ENGINE!r}")
+DASHBOARD_DEADLINE = upstream.env_float("DASHBOARD_DEADLINE", 5.0)
+SCHEDULER_DEADLINE = upstream.env_float("SCHEDULER_DEADLINE", 30.0)
+# Upper bound on upstream time (calls plus retry waits) spent for one API request
+REQUEST_DEADLINE = upstream.env_float("REQUEST_DEADLINE", 30.0)
+GEMINI_TIMEOUT = upstream.env_float("GEMINI_TIMEOUT", 60.0)
+
+# Users besides the one configured above, with their own tokens (see users.py); a request acts for the user its API key belongs to
+USERS_FILE = os.getenv("USERS_FILE", "users.json")
+credentials = load_credentials(USERS_FILE, {
+    "jira_token": jira_api_token,
+    "reviewboard_token": reviewboard_api_token,
+    "graph_token_cache": CACHE_FILE,
+    "graph_token": os.getenv("GRAPH_ACCESS_TOKEN"),
+    "api_key": os.getenv("API_KEY"),
+    "team": os.getenv("TEAM_NAME"),
+})
+# Header carrying the user id when an SSO proxy in front of the server authenticates callers; only set it if the proxy strips it from client requests
+AUTH_PROXY_HEADER = os.getenv("AUTH_PROXY_HEADER")
+# Origins allowed to call the API from a browser; credentials travel in headers, so no cookies are allowed
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+
+# Cached data and schedules are kept on disk too, so a restarted server (or another worker) answers at once; "" disables it
+PERSISTENT_CACHE_PATH = os.getenv("PERSISTENT_CACHE_PATH", "taskit_cache.db")
+persistent_cache = PersistentCache(PERSISTENT_CACHE_PATH) if PERSISTENT_CACHE_PATH else None
+# Bump when a source's record fields change so older disk copies are not restored
+RECORD_SCHEMAS = {"jira": 1, "review-board": 1, "meetings": 1}
+
+# Latest data per source; set SNAPSHOT_PERSIST_DIR to also write the JSON files in the background
+SNAPSHOT_PERSIST_DIR = os.getenv("SNAPSHOT_PERSIST_DIR")
+
+def publish_restored(source):
+    # Data read from disk (after a restart, or saved by another worker) is published like a fetch would be
+    def restored(user_id, value):
+        session = users.get(user_id)
+        if session is not None:
+            session.snapshot_store.publish(source, value)
+    return restored
+
+def start_of_today():
+    return datetime.now(get_localzone()).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+# Meetings are labelled "Today", so a copy saved before local midnight would show yesterday's calendar
+RESTORE_SINCE = {"meetings": start_of_today}
+
+def response_cache(name, source, ttl, size):
+    return TTLCache(name, ttl=ttl, max_entries=size, store=persistent_cache, schema=RECORD_SCHEMAS[name],
+                    on_restore=publish_restored(source), valid_since=RESTORE_SINCE.get(name))
+
+# Response caches (TTL in seconds, size in entries per source), keyed by user id
+CACHE_SIZE = max(32, len(credentials))
+response_caches = {
+    "jira": response_cache("jira", snapshots.JIRA, upstream.env_float("JIRA_CACHE_TTL", 60), upstream.env_int("JIRA_CACHE_SIZE", CACHE_SIZE)),
+    "review-board": response_cache("review-board", snapshots.REVIEWS, upstream.env_float("REVIEWBOARD_CACHE_TTL", 60), upstream.env_int("REVIEWBOARD_CACHE_SIZE", CACHE_SIZE)),
+    "meetings": response_cache("meetings", snapshots.MEETINGS, upstream.env_float("MEETINGS_CACHE_TTL", 120), upstream.env_int("MEETINGS_CACHE_SIZE", CACHE_SIZE)),
+}
+# Schedules are keyed by their inputs, so users with identical inputs share one
+schedule_cache = ScheduleCache(store=persistent_cache)
+schedule_flight = SingleFlight()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Shared pools; each user's session adds its own Authorization header
+    upstream.register("jira", jira_url, headers=jira_headers)
+    upstream.register("reviewboard", REVIEWBOARD_DOMAIN, headers=reviewboard_headers)
+    upstream.register("graph", GRAPH_URL)
+    users.get(DEFAULT_USER)
+    users.start()
+    # One small query; source caches restore themselves on first use
+    await schedule_cache.restore()
+    if PREFETCH_ENABLED:
+        prefetcher.start()
+    yield
+    await prefetcher.stop()
+    await users.stop()
+    await upstream.close_all()
+    if persistent_cache is not None:
+        await persistent_cache.flush()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=False,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.middleware("http")
+async def record_server_timing(request, call_next):
+    started = time.perf_counter()
+    timings = metrics.start_request_timings()
+    with upstream.deadline(REQUEST_DEADLINE):
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed)
+    response.headers["Timing-Allow-Origin"] = "*"
+    route = request.scope.get("route")
+    metrics.HTTP_DURATION.observe(elapsed, path=route.path if route else "unmatched", status=str(response.status_code))
+    return response
 
 # Helper Functions
-def filtered_jira_json(issue):
-    fields = issue.get('fields', {})
-    return {
-        "Issue Key": issue.get('key'),
-        "Summary": fields.get('summary'),
-        "issuetype": fields.get('issuetype', {}).get('name') if fields.get('issuetype') else None,
-        "status": fields.get('status', {}).get('name') if fields.get('status') else None,
-        "creator": fields.get('creator', {}).get('displayName') if fields.get('creator') else None,
-        "Severity": fields['customfield_10423']['value'] if fields.get('customfield_10423') and isinstance(fields.get('customfield_10423'), dict) else None,
-        "reporter": fields.get('reporter', {}).get('displayName') if fields.get('reporter') else None,
-        "Stopper": fields['customfield_10007']['value'] if fields.get('customfield_10007') and isinstance(fields.get('customfield_10007'), dict) else None,
-        "fixVersions": fields['fixVersions'][0]['name'] if fields.get('fixVersions') and len(fields['fixVersions']) > 0 and isinstance(fields['fixVersions'][0], dict) else None,
-        "priority": fields.get('priority', {}).get('name') if fields.get('priority') else None,
-        "duedate": fields.get('duedate')
-    }
+JIRA_JQL = "assignee = currentUser() AND resolution = Unresolved ORDER BY updated DESC"
+# Exactly the fields filtered_jira_json reads
+JIRA_FIELDS = ["summary", "issuetype", "status", "creator", "customfield_10423", "reporter", "customfield_10007", "fixVersions", "priority", "duedate"]
 
+# Generated once from the field spec in records.py
+filtered_jira_json = extract_jira_issue
+
+
+# Incremental Jira sync ("incremental") or a full search on every fetch ("full")
+JIRA_SYNC_MODE = os.getenv("JIRA_SYNC_MODE", "incremental")
+JIRA_STORE_PATH = os.getenv("JIRA_STORE_PATH", "jira_store.db")
+
+
+JIRA_TAG = re.compile(r'Jira:\s*(\S+)')
+FIX_DESCRIPTION_TAG = re.compile(r'Fix Description:\s*(.*?)(?:Impacts UI|$)', re.DOTALL)
 
 def extract_tags(description):
     if "Jira:" in description and "Fix Description:" in description:
-        jira_match = re.search(r'Jira:\s*(\S+)', description)
-        fix_match = re.search(r'Fix Description:\s*(.*?)(?:Impacts UI|$)', description, re.DOTALL)
+        jira_match = JIRA_TAG.search(description)
+        fix_match = FIX_DESCRIPTION_TAG.search(description)
         jira_id = jira_match.group(1).strip() if jira_match else None
         fix_description = fix_match.group(1).strip() if fix_match else None
         return jira_id, fix_description
     else:
         return None
 
-# Endpoints
-@app.get("/api/jira/")
-def get_jira_issues():
-    jql_query = "assignee = currentUser() AND resolution = Unresolved ORDER BY updated DESC"
-    encoded_jql = requests.utils.quote(jql_query)
-    URL = f"{jira_url}/rest/api/2/search?jql={encoded_jql}"
-    response = requests.get(URL, headers=jira_headers)
-    if response.status_code == 200:
-        issues = response.json().get('issues', [])
-        filtered_data = [filtered_jira_json(issue) for issue in issues]        
-        with open("jira.json", "w") as f:
-            json.dump(filtered_data, f, indent=2)
-        return JSONResponse(content=filtered_data)
-    else:
-        return JSONResponse(status_code=response.status_code, content={"error": response.text})
+def review_request_json(request):
+    request_data = extract_review_request(request)
+    jira_id = None
+    result = extract_tags(request_data['description'])
+    if result:
+        jira_id, request_data['description'] = result
+    request_data['reviewers'] = [r['title'] for r in request.get('target_people', [])]
+    request_data['labels'] = []
+    request_data['due_date'] = ''
+    return request_data, jira_id
 
-@app.get("/api/review-board/")
-def get_review_requests():
-    session_url = f"{REVIEWBOARD_DOMAIN}/api/session/"
-    response = requests.get(session_url, headers=reviewboard_headers)
-    if response.status_code != 200:
-        return JSONResponse(status_code=response.status_code, content={"error": "Failed to fetch Review Board user info"})
-    username = response.json()['session']['links']['user']['title']
-    reviewboard_api_url = f"{REVIEWBOARD_DOMAIN}/api/review-requests/?to-users={username}"
+def user_path(path, user_id):
+    # "jira_store.db" -> "jira_store.alice.db"; the default user keeps the plain name
+    if user_id == DEFAULT_USER:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{user_id}{ext}"
+
+def new_session(user_id, tokens):
+    persist_dir = SNAPSHOT_PERSIST_DIR
+    if persist_dir and user_id != DEFAULT_USER:
+        persist_dir = os.path.join(persist_dir, user_id)
+        os.makedirs(persist_dir, exist_ok=True)
+    return UserSession(
+        user_id,
+        jira_headers={"Authorization": f"Bearer {tokens.get('jira_token')}"},
+        reviewboard_headers={"Authorization": f"token {tokens.get('reviewboard_token')}"},
+        graph_auth=GraphTokenManager(CLIENT_ID, AUTHORITY, SCOPES, tokens.get("graph_token_cache") or user_path(CACHE_FILE, user_id),
+                                     static_token=tokens.get("graph_token")),
+        jira_store=JiraStore(user_path(JIRA_STORE_PATH, user_id), JIRA_JQL, JIRA_FIELDS, filtered_jira_json),
+        reviewboard_sync=ReviewBoardSync(review_request_json),
+        snapshot_store=SnapshotStore(persist_dir),
+    )
+
+users = UserDirectory(credentials, new_session)
+
+def format_event(event, isToday, my_email, local_tz):
+    formatted = extract_calendar_event(event)
+    # Graph's /me can have no mail (e.g. accounts without a mailbox)
+    my_email = (my_email or "").lower()
+    attendance_type = ""
+    Attendees_list = []
+    for attendee in event.get("attendees", []):
+        email_address = attendee.get("emailAddress", {})
+        Attendees_list.append(email_address.get("name", ""))
+        if my_email and (email_address.get("address") or "").lower() == my_email:
+            attendance_type = attendee.get("type", "unknown")
     try:
-        response = requests.get(reviewboard_api_url, headers=reviewboard_headers)
-        response.raise_for_status()
-        data = response.json()
-        review_requests = data.get('review_requests', [])
-        all_requests = []
-        for request in review_requests:
-            request_data = {}
-            jira_id = None
-            request_data['id'] = request['id']
-            result = extract_tags(request['description'])
-            if result:
-                jira_id, fix_description = result
-                request_data['description'] = fix_description
-            else:
-                request_data['description'] = request['description']
-            reviewers = request['target_people']
-            reviewer_list = [r['title'] for r in reviewers]
-            request_data['submitter'] = request['links']['submitter']['title']
-            request_data['reviewers'] = reviewer_list
-            request_data['labels'] = []
-            request_data['due_date'] = ''
-            if jira_id:
-                issue_url = f"{jira_url}/rest/api/2/issue/{jira_id}"
-                response = requests.get(issue_url, headers=jira_headers)
-                if response.status_code == 200:
-                    issue = response.json()
-                    request_data['labels'] = issue['fields'].get('labels', [])
-                    request_data['due_date'] = issue['fields'].get('duedate', '')
-            all_requests.append(request_data)
-        with open('review_requests.json', 'w') as f:
-            json.dump(all_requests, f, indent=4)
-        return JSONResponse(content=all_requests)
-    except requests.exceptions.RequestException as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        start_dt = datetime.fromisoformat(formatted["start"]).replace(tzinfo=timezone.utc).astimezone(local_tz)
+        end_dt = datetime.fromisoformat(formatted["end"]).replace(tzinfo=timezone.utc).astimezone(local_tz)
+        formatted["start"] = start_dt.strftime("%I:%M %p")
+        formatted["end"] = end_dt.strftime("%I:%M %p")
+        date_str = start_dt.strftime("%Y-%m-%d")
+    except Exception:
+        date_str = ""
+    formatted["date"] = date_str if not isToday else "Today"
+    formatted["attendance_type"] = attendance_type
+    formatted["Attendees_list"] = Attendees_list
+    return formatted
 
-@app.get("/api/meetings/")
-def get_teams_calendar():
-    if os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, "r") as f:
-            cache_data = json.load(f)
-            token_cache = msal.SerializableTokenCache()
-            token_cache.deserialize(json.dumps(cache_data))
-    else:
-        token_cache = msal.SerializableTokenCache()
+def error_response(e):
+    headers = {"Retry-After": str(math.ceil(e.retry_in))} if isinstance(e, CircuitOpenError) else None
+    return ORJSONResponse(status_code=e.status_code, content={"error": e.detail}, headers=headers)
+
+def cache_headers(status):
+    return {"X-Cache": status}
+
+def invalid_engine(engine):
+    return ORJSONResponse(status_code=400, content={"error": f"Unknown engine {engine!r}; use one of {', '.join(SCHEDULER_ENGINES)}"})
+
+def caller_id(request, query_key=False):
+    """Id of the user making ``request``, or ``None`` if it is not authenticated.
+
+    The key is sent as ``Authorization: Bearer <key>`` or ``X-API-Key``.
+    With ``query_key``, ``?api_key=`` is accepted too: only for the
+    ``EventSource`` streams, which cannot set headers, since URLs end up in
+    access logs.
+    """
+    if AUTH_PROXY_HEADER and request.headers.get(AUTH_PROXY_HEADER):
+        user = request.headers[AUTH_PROXY_HEADER]
+        return user if user in users.credentials else None
+    authorization = request.headers.get("Authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        return users.authenticate(authorization[7:].strip())
+    api_key = request.headers.get("X-API-Key") or (request.query_params.get("api_key") if query_key else None)
+    return users.authenticate(api_key)
+
+def caller_session(request, user=None, query_key=False):
+    """``(session, None)`` for the authenticated caller, or ``(None, error response)``.
 
-    def save_cache():
-        if token_cache.has_state_changed:
-            with open(CACHE_FILE, "w") as f:
-                f.write(token_cache.serialize())
+    ``?user=`` is still accepted but may only name the caller.
+    """
+    caller = caller_id(request, query_key)
+    if caller is None:
+        return None, ORJSONResponse(status_code=401, content={"error": "Missing or invalid API key"}, headers={"WWW-Authenticate": "Bearer"})
+    if user is not None and user != caller:
+        return None, ORJSONResponse(status_code=403, content={"error": f"Not allowed to act as {user}"})
+    return users.get(caller), None
 
-    app_msal = msal.PublicClientApplication(CLIENT_ID, authority=AUTHORITY, token_cache=token_cache)
-    accounts = app_msal.get_accounts()
-    if accounts:
-        result = app_msal.acquire_token_silent(SCOPES, account=accounts[0])
+def team_members(request, requested):
+    """``(user ids, None)`` for a team request by a member of that team, or ``(None, error response)``.
+
+    ``requested`` is the comma-separated ``?users=``; empty means the caller's whole team.
+    """
+    session, denied = caller_session(request)
+    if denied:
+        return None, denied
+    team = users.team(session.user_id)
+    if not team:
+        return None, ORJSONResponse(status_code=403, content={"error": f"{session.user_id} is not in a team"})
+    members = list(dict.fromkeys(user for user in requested.split(",") if user)) or team
+    outside = [user for user in members if user not in team]
+    if outside:
+        return None, ORJSONResponse(status_code=403, content={"error": f"Not in your team: {','.join(outside)}"})
+    return members, None
+
+def unknown_user(user):
+    return ORJSONResponse(status_code=404, content={"error": f"Unknown user {user}"})
+
+# Fetchers
+async def fetch_jira_issues(session):
+    jira = session.jira()
+    if JIRA_SYNC_MODE == "incremental":
+        filtered_data = await session.jira_store.sync(jira)
     else:
-        result = app_msal.initiate_device_flow(scopes=SCOPES)
-        if "user_code" not in result:
-            return JSONResponse(status_code=500, content={"error": "Failed to initiate device flow"})
-        print(result["message"])
-        result = app_msal.acquire_token_by_device_flow(result)
+        filtered_data = []
+        async for issues in iter_search_pages(jira, JIRA_JQL, JIRA_FIELDS):
+            filtered_data.extend(filtered_jira_json(issue) for issue in issues)
+    session.snapshot_store.publish(snapshots.JIRA, filtered_data)
+    return filtered_data
 
-    save_cache()
+async def stream_jira_issues(pages):
+    try:
+        async for issues in pages:
+            yield b"".join(orjson.dumps(filtered_jira_json(issue)) + b"\n" for issue in issues)
+    except UpstreamError as e:
+        yield orjson.dumps({"error": e.detail, "status": e.status_code}) + b"\n"
 
-    if "access_token" not in result:
-        return JSONResponse(status_code=401, content={"error": result.get("error_description", "Token acquisition failed")})
+async def fetch_review_requests(session):
+    all_requests, changed = await session.reviewboard_sync.sync(session.reviewboard(), session.jira())
+    if changed or session.snapshot_store.get(snapshots.REVIEWS) is None:
+        session.snapshot_store.publish(snapshots.REVIEWS, all_requests)
+    return all_requests
 
-    token = result["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
-    profile_response = requests.get("https://graph.microsoft.com/v1.0/me", headers=headers)
-    profile_data = profile_response.json()
-    my_email = profile_data.get("mail")
+def not_signed_in(session):
+    return UpstreamError(401, f"{session.user_id} has not signed in to Microsoft Graph; sign in with POST /api/auth/graph/device")
+
+async def fetch_calendar_events(session):
+    graph_auth = session.graph_auth
+    # Every path to the calendar (own views, team views, prefetch) stops here; signing in is POST /api/auth/graph/device
+    if not await graph_auth.has_session():
+        raise not_signed_in(session)
+    headers = await graph_auth.headers()
     local_tz = get_localzone()
 
     today = datetime.utcnow().date()
     start_of_day = datetime.combine(today, datetime.min.time()).isoformat() + "Z"
     end_of_day = datetime.combine(today, datetime.max.time()).isoformat() + "Z"
 
-    url_today = f"https://graph.microsoft.com/v1.0/me/calendar/calendarView?startDateTime={start_of_day}&endDateTime={end_of_day}"
-    response_today = requests.get(url_today, headers=headers)
-    events_today = response_today.json().get("value", [])
-
-    past_24_hours = (datetime.utcnow() - timedelta(hours=24)).isoformat() + "Z"
-    url_recent = f"https://graph.microsoft.com/v1.0/me/events?$filter=createdDateTime ge {past_24_hours}"
-    response_recent = requests.get(url_recent, headers=headers)
-    events_recent = response_recent.json().get("value", [])
-
-    def format_event(event, isToday):
-        subject = event.get("subject", "No Subject")
-        start = event.get("start", {}).get("dateTime", "N/A")
-        end = event.get("end", {}).get("dateTime", "N/A")
-        location = event.get("location", {}).get("displayName", "No Location")
-        organizer = event.get("organizer", {}).get("emailAddress", {}).get("name", "No Name")
-        attendance_type = ""
-        Attendees_list=[]                
-        for attendee in event.get("attendees", []):
-            Attendees_list.append(attendee.get("emailAddress", {}).get("name", ""))
-            email = attendee.get("emailAddress", {}).get("address", "")
-            if email.lower() == my_email.lower():
-                attendance_type = attendee.get("type", "unknown")
+    profile_data, events_today = await session.calendar_fetcher.fetch(
+        session.graph(), headers, (start_of_day, end_of_day), graph_auth.cached_profile)
+    graph_auth.remember_profile(profile_data)
+    my_email = profile_data.get("mail")
+
+    formatted_today = [format_event(e, True, my_email, local_tz) for e in events_today]
+    session.snapshot_store.publish(snapshots.MEETINGS, formatted_today)
+    return formatted_today
+
+# Response cache -> fetcher(session)
+SOURCE_FETCHERS = {
+    "jira": fetch_jira_issues,
+    "review-board": fetch_review_requests,
+    "meetings": fetch_calendar_events,
+}
+
+def cached_source(name, session, fresh=False, loader=None):
+    """``(data, status)`` for one user's source from its response cache."""
+    loader = loader or SOURCE_FETCHERS[name]
+    return response_caches[name].get(session.user_id, lambda: loader(session), fresh=fresh)
+
+# Scheduler input -> response cache
+SCHEDULER_INPUTS = {
+    snapshots.MEETINGS: "meetings",
+    snapshots.REVIEWS: "review-board",
+    snapshots.JIRA: "jira",
+}
+
+# Endpoints
+@app.get("/api/jira/")
+async def get_jira_issues(request: Request, fresh: bool = False, format: str = "json", user: str = None):
+    session, denied = caller_session(request, user)
+    if denied:
+        return denied
+    if format == "ndjson":
+        # Stream pages straight from Jira; the first page is awaited so errors keep their status code
+        pages = iter_search_pages(session.jira(), JIRA_JQL, JIRA_FIELDS)
         try:
-            start_dt = datetime.fromisoformat(start).replace(tzinfo=timezone.utc).astimezone(local_tz)
-            end_dt = datetime.fromisoformat(end).replace(tzinfo=timezone.utc).astimezone(local_tz)
-            start_str = start_dt.strftime("%I:%M %p")
-            end_str = end_dt.strftime("%I:%M %p")
-            date_str = start_dt.strftime("%Y-%m-%d")
-        except Exception:
-            start_str = start
-            end_str = end
-            date_str = ""
-        return {
-            "subject": subject,
-            "start": start_str,
-            "end": end_str,
-            "date": date_str if not isToday else "Today",
-            "location": location,
-            "organizer": organizer,
-            "attendance_type": attendance_type,
-            "Attendees_list": Attendees_list
-        }
-
-    formatted_today = [format_event(e, True) for e in events_today]
-    formatted_recent = [format_event(e, False) for e in events_recent]
-    with open("calendar_events.json", "w") as f:
-        json.dump(formatted_today, f, indent=2)
-    return JSONResponse(content=formatted_today)
+            first_page = await pages.__anext__()
+        except UpstreamError as e:
+            return error_response(e)
+        async def all_pages():
+            yield first_page
+            while True:
+                # The stream may outlast REQUEST_DEADLINE, so each page gets a deadline of its own
+                with upstream.deadline(REQUEST_DEADLINE, replace=True):
+                    try:
+                        issues = await pages.__anext__()
+                    except StopAsyncIteration:
+                        return
+                yield issues
+        return StreamingResponse(stream_jira_issues(all_pages()), media_type="application/x-ndjson")
+    try:
+        filtered_data, status = await cached_source("jira", session, fresh)
+    except UpstreamError as e:
+        return error_response(e)
+    return ORJSONResponse(content=filtered_data, headers=cache_headers(status))
 
-@app.get("/api/taskscheduler/")
-def get_gemini_taskscheduler():
-    genai.configure(api_key=GEMINI_API)
+@app.get("/api/review-board/")
+async def get_review_requests(request: Request, fresh: bool = False, user: str = None):
+    session, denied = caller_session(request, user)
+    if denied:
+        return denied
+    try:
+        all_requests, status = await cached_source("review-board", session, fresh)
+    except UpstreamError as e:
+        return error_response(e)
+    headers = cache_headers(status)
+    # Counted over the records in this response; left out when some were not enriched here (e.g. restored from disk)
+    counts = session.reviewboard_sync.enrichment_counts(all_requests)
+    if counts is not None:
+        headers["X-Jira-Keys-Resolved"] = str(counts["resolved"])
+        headers["X-Jira-Keys-Missed"] = str(counts["missed"])
+    return ORJSONResponse(content=all_requests, headers=headers)
 
-    # Choose the model
-    model = genai.GenerativeModel("gemini-1.5-flash")
+@app.get("/api/meetings/")
+async def get_teams_calendar(request: Request, fresh: bool = False, user: str = None):
+    session, denied = caller_session(request, user)
+    if denied:
+        return denied
+    try:
+        formatted_today, status = await cached_source("meetings", session, fresh)
+    except UpstreamError as e:
+        return error_response(e)
+    return ORJSONResponse(content=formatted_today, headers=cache_headers(status))
 
-    # Load JSON files
-    with open("calendar_events.json", "r") as f:
-        calendar = json.load(f)
+@app.get("/api/cache/stats")
+async def get_cache_stats(request: Request):
+    _, denied = caller_session(request)
+    if denied:
+        return denied
+    sessions = users.sessions()
+    stats = {name: cache.stats() for name, cache in response_caches.items()}
+    stats["schedule"] = {**schedule_cache.stats(), "coalesced_runs": schedule_flight.shared}
+    stats["prefetch"] = prefetcher.stats() if PREFETCH_ENABLED else None
+    stats["upstreams"] = upstream.stats()
+    stats["persistent"] = persistent_cache.stats() if persistent_cache is not None else None
+    stats["live_updates"] = {
+        "subscribers": sum(session.live_updates.subscribers() for session in sessions),
+        "published": sum(session.live_updates.published for session in sessions),
+    }
+    stats["users"] = {"configured": len(users.ids()), "active": len(sessions)}
+    stats["team"] = team_stats
+    return ORJSONResponse(content=stats)
 
-    with open("review_requests.json", "r") as f:
-        reviews = json.load(f)
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-    with open("jira.json", "r") as f:
-        jira_tasks = f.readlines()
+# Bump when the prompt or the local rules change so memoized schedules are not reused
+SCHEDULE_PROMPT_VERSION = "2"
 
-    # Build prompt
-    prompt = f"""
-    Generate a daily task schedule for me based on the provided JSON data.
+SCHEDULE_PROMPT = """
+    Generate a daily task schedule for me based on the provided data.
 
     **Working Hours and Duration Estimates:**
     *   My working hours are strictly from 9:00 AM to 5:00 PM.
@@ -307,30 +534,530 @@ def get_gemini_taskscheduler():
     *   For `task_type: "Break"`:
         -   `task_id`: (null)
 
-    **Input JSON Files:**
+    **Input Data:**
+    Each section below is a table: the first line names the columns, then one row per item with values separated by `|`. An empty value means null.
 
-    ### calendar_events.json ###
-    {json.dumps(calendar, indent=2)}
+"""
+SCHEDULE_PROMPT_TOKENS = estimate_tokens(SCHEDULE_PROMPT)
 
-    ### jira.json ###
-    {json.dumps(jira_tasks, indent=2)}
+def schedule_prompt(calendar, reviews, jira_tasks):
+    # Fixed rules plus compact tables of only the fields they use
+    inputs, stats = encode_inputs(calendar, reviews, jira_tasks, reserved_tokens=SCHEDULE_PROMPT_TOKENS)
+    return SCHEDULE_PROMPT + inputs, stats
 
-    ### review_requests.json ###
-    {json.dumps(reviews, indent=2)}
-    """
+def record_usage(response, stats):
+    usage = getattr(response, "usage_metadata", None)
+    stats["prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+    stats["output_tokens"] = getattr(usage, "candidates_token_count", None)
+    logger.info("Scheduler prompt: %(estimated_tokens)s estimated / %(prompt_tokens)s actual tokens, %(dropped_items)s items dropped", stats)
 
-    # Send a prompt
-    response = model.generate_content(prompt)
+def gemini_model():
+    if GEMINI_API_ENDPOINT:
+        genai.configure(api_key=GEMINI_API, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai.configure(api_key=GEMINI_API)
+    # Choose the model
+    return genai.GenerativeModel("gemini-1.5-flash")
+
+async def in_thread(iterable):
+    iterator = iter(iterable)
+    end = object()
+    while (item := await asyncio.to_thread(next, iterator, end)) is not end:
+        yield item
+
+async def llm_schedule(calendar, reviews, jira_tasks):
+    """Return ``(schedule, prompt_stats)`` for one Gemini call."""
+    model = gemini_model()
+    prompt, stats = schedule_prompt(calendar, reviews, jira_tasks)
+
+    # Send a prompt (the SDK's async client has no REST transport, so REST calls run in a thread)
+    with metrics.timed("gemini", "generate_content"):
+        if GEMINI_API_ENDPOINT:
+            response = await asyncio.to_thread(model.generate_content, prompt, request_options={"timeout": GEMINI_TIMEOUT})
+        else:
+            response = await model.generate_content_async(prompt, request_options={"timeout": GEMINI_TIMEOUT})
+    record_usage(response, stats)
 
     valid_response = response.text
     cleaned_text = valid_response[8:-4]
 
     # Parse the cleaned text into JSON
+    return json.loads(cleaned_text), stats
+
+async def stream_llm_schedule(calendar, reviews, jira_tasks):
+    """Yield schedule items as soon as Gemini has finished generating each one."""
+    model = gemini_model()
+    prompt, stats = schedule_prompt(calendar, reviews, jira_tasks)
+
+    if GEMINI_API_ENDPOINT:
+        # Chunks are read in the thread below, so the stream is timed as a whole
+        response = await asyncio.to_thread(model.generate_content, prompt, stream=True, request_options={"timeout": GEMINI_TIMEOUT})
+        chunks = in_thread(response)
+    else:
+        response = await model.generate_content_async(prompt, stream=True, request_options={"timeout": GEMINI_TIMEOUT})
+        chunks = response
+    parser = JSONArrayStream()
+    with metrics.timed("gemini", "stream_generate_content"):
+        async for chunk in chunks:
+            for item in parser.feed(chunk.text):
+                yield item
+    record_usage(response, stats)
+    if not parser.done:
+        raise json.JSONDecodeError("Schedule array was not terminated", parser.pending, 0)
+
+def publish_schedule(session, parsed_json):
+    # A schedule shared with another user (same inputs) is published once per user
+    current = session.snapshot_store.get(snapshots.SCHEDULE)
+    if current is None or current.data is not parsed_json:
+        session.snapshot_store.publish(snapshots.SCHEDULE, parsed_json)
+
+def save_schedule(session, key, parsed_json):
+    schedule_cache.set(key, parsed_json)
+    publish_schedule(session, parsed_json)
+
+async def compute_schedule(key, engine, calendar, reviews, jira_tasks):
+    if engine == "local":
+        parsed_json, stats = build_schedule(calendar, reviews, jira_tasks), None
+    else:
+        parsed_json, stats = await llm_schedule(calendar, reviews, jira_tasks)
+    schedule_cache.set(key, parsed_json)
+    return parsed_json, stats
+
+async def run_scheduler(session, engine, calendar, reviews, jira_tasks):
+    """Return ``(schedule, cache_status, prompt_stats)``; identical inputs reuse the earlier result until end of day.
+
+    ``prompt_stats`` belongs to the Gemini call that produced this schedule;
+    it is ``None`` for a cache hit or the local engine.
+    """
+    key = input_key(engine, SCHEDULE_PROMPT_VERSION, calendar, reviews, jira_tasks)
+    cached = schedule_cache.get(key)
+    if cached is not None:
+        publish_schedule(session, cached)
+        return cached, "HIT", None
+    # Concurrent requests with the same inputs share one Gemini call, and its stats
+    parsed_json, stats = await schedule_flight.do(key, lambda: compute_schedule(key, engine, calendar, reviews, jira_tasks))
+    publish_schedule(session, parsed_json)
+    return parsed_json, "MISS", stats
+
+# Background refresh of every active user's sources (and the default engine's schedule) during working hours
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+
+def source_refresher(name):
+    async def refresh_one(session):
+        if name == "meetings" and not await session.graph_auth.has_session():
+            return True
+        _, status = await cached_source(name, session, fresh=True, loader=team_loader(name))
+        # A fallback is still a failure for the prefetcher's back-off, even though readers got the last good data
+        return status != FALLBACK
+
+    async def refresh():
+        results = await asyncio.gather(*(refresh_one(session) for session in users.sessions()), return_exceptions=True)
+        failed = sum(result is not True for result in results)
+        if failed:
+            raise UpstreamError(503, f"{name} refresh failed for {failed} of {len(results)} users")
+    return refresh
+
+async def any_signed_in():
+    return any([await session.graph_auth.has_session() for session in users.sessions()])
+
+def schedule_inputs_ready(session):
+    return len(session.snapshot_store.view(*SCHEDULER_INPUTS)) == len(SCHEDULER_INPUTS)
+
+async def any_schedule_inputs_ready():
+    return any(schedule_inputs_ready(session) for session in users.sessions())
+
+async def prefetch_schedule():
+    for session in users.sessions():
+        if schedule_inputs_ready(session):
+            view = session.snapshot_store.view(*SCHEDULER_INPUTS)
+            await run_scheduler(session, SCHEDULER_ENGINE, *(view[source].data for source in (snapshots.MEETINGS, snapshots.REVIEWS, snapshots.JIRA)))
+
+def prefetch_interval(name, cache):
+    # Refresh before the cached copy expires, so endpoints keep getting hits
+    return upstream.env_float(f"PREFETCH_{name.upper().replace('-', '')}_INTERVAL", cache.ttl * 0.8)
+
+prefetcher = Prefetcher([
+    PrefetchJob("jira", source_refresher("jira"), prefetch_interval("jira", response_caches["jira"])),
+    PrefetchJob("review-board", source_refresher("review-board"), prefetch_interval("review-board", response_caches["review-board"])),
+    PrefetchJob("meetings", source_refresher("meetings"), prefetch_interval("meetings", response_caches["meetings"]), ready=any_signed_in),
+    PrefetchJob("schedule", prefetch_schedule, upstream.env_float("PREFETCH_SCHEDULE_INTERVAL", 300), ready=any_schedule_inputs_ready),
+])
+
+async def iterate(items):
+    for item in items:
+        yield item
+
+async def schedule_events(items, cache_status):
+    count = 0
+    try:
+        async for item in items:
+            count += 1
+            yield sse_event("item", item)
+    except Exception as e:
+        # Headers are already sent, so failures are reported in-band
+        logger.warning("Streaming schedule failed after %d items: %s", count, e)
+        yield sse_event("error", {"error": str(e), "items": count})
+        return
+    yield sse_event("done", {"items": count, "cache": cache_status})
+
+def stream_scheduler(session, engine, calendar, reviews, jira_tasks):
+    """Return ``(events, cache_status)``: an SSE stream with one ``item`` event per schedule entry."""
+    key = input_key(engine, SCHEDULE_PROMPT_VERSION, calendar, reviews, jira_tasks)
+    cached = schedule_cache.get(key)
+    if cached is not None:
+        publish_schedule(session, cached)
+        return schedule_events(iterate(cached), "HIT"), "HIT"
+    if engine == "local":
+        parsed_json = build_schedule(calendar, reviews, jira_tasks)
+        save_schedule(session, key, parsed_json)
+        return schedule_events(iterate(parsed_json), "MISS"), "MISS"
+
+    async def generated():
+        items = []
+        async for item in stream_llm_schedule(calendar, reviews, jira_tasks):
+            items.append(item)
+            yield item
+        # Only a complete schedule is memoized
+        save_schedule(session, key, items)
+    return schedule_events(generated(), "MISS"), "MISS"
+
+@app.get("/api/taskscheduler/")
+async def get_gemini_taskscheduler(request: Request, engine: str = SCHEDULER_ENGINE, format: str = "json", user: str = None):
+    session, denied = caller_session(request, user, query_key=format == "sse")
+    if denied:
+        return denied
+    if engine not in SCHEDULER_ENGINES:
+        return invalid_engine(engine)
+    # One consistent view of the published inputs; sources nobody has fetched yet are loaded now
+    snapshot_store = session.snapshot_store
+    view = snapshot_store.view(*SCHEDULER_INPUTS)
+    missing = [source for source in SCHEDULER_INPUTS if source not in view]
+    if missing:
+        await asyncio.gather(*(cached_source(SCHEDULER_INPUTS[source], session) for source in missing), return_exceptions=True)
+        view = snapshot_store.view(*SCHEDULER_INPUTS)
+    calendar, reviews, jira_tasks = (view[source].data if source in view else [] for source in (snapshots.MEETINGS, snapshots.REVIEWS, snapshots.JIRA))
+    unavailable = [source for source in SCHEDULER_INPUTS if source not in view]
+
+    if format == "sse":
+        events, cache_status = stream_scheduler(session, engine, calendar, reviews, jira_tasks)
+        headers = {"X-Scheduler-Engine": engine, "X-Schedule-Cache": cache_status, "Cache-Control": "no-cache"}
+        if unavailable:
+            headers["X-Missing-Sources"] = ",".join(unavailable)
+        return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+    try:
+        parsed_json, cache_status, stats = await run_scheduler(session, engine, calendar, reviews, jira_tasks)
+        headers = {"X-Scheduler-Engine": engine, "X-Schedule-Cache": cache_status}
+        if unavailable:
+            headers["X-Missing-Sources"] = ",".join(unavailable)
+        if stats is not None:
+            headers["X-Prompt-Tokens"] = str(stats.get("prompt_tokens") or stats.get("estimated_tokens"))
+        return ORJSONResponse(content=parsed_json, headers=headers)
+
+    except json.JSONDecodeError as e:
+        return ORJSONResponse(status_code=500, content={"error": str(e)})
+
+async def fetch_source(session, name, deadline, fresh=False, loader=None):
+    # Shielded so a fetch that misses the deadline still completes and fills the cache
+    cache = response_caches[name]
+    task = asyncio.ensure_future(cached_source(name, session, fresh, loader))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        data, cache_status = await asyncio.wait_for(asyncio.shield(task), deadline)
+    except asyncio.TimeoutError:
+        return {"status": "timeout", "data": cache.peek(session.user_id) or []}
+    except UpstreamError as e:
+        return {"status": "error", "error": e.detail, "data": cache.peek(session.user_id) or []}
+    except Exception as e:
+        # One broken source must not fail the whole dashboard
+        logger.exception("Fetching %s for %s failed", name, session.user_id)
+        return {"status": "error", "error": str(e) or type(e).__name__, "data": cache.peek(session.user_id) or []}
+    if cache_status == FALLBACK:
+        return {"status": "stale", "cache": cache_status, "data": data}
+    return {"status": "ok", "cache": cache_status, "data": data}
+
+@app.get("/api/dashboard/")
+async def get_dashboard(request: Request, engine: str = SCHEDULER_ENGINE, deadline: float = DASHBOARD_DEADLINE, fresh: bool = False, user: str = None):
+    session, denied = caller_session(request, user)
+    if denied:
+        return denied
+    if engine not in SCHEDULER_ENGINES:
+        return invalid_engine(engine)
+    jira, reviews, meetings = await asyncio.gather(
+        fetch_source(session, "jira", deadline, fresh),
+        fetch_source(session, "review-board", deadline, fresh),
+        fetch_source(session, "meetings", deadline, fresh),
+    )
+    schedule = {"status": "ok", "engine": engine}
+    try:
+        schedule["data"], schedule["cache"], _ = await asyncio.wait_for(
+            run_scheduler(session, engine, meetings["data"], reviews["data"], jira["data"]),
+            None if engine == "local" else SCHEDULER_DEADLINE,
+        )
+    except asyncio.TimeoutError:
+        schedule.update(status="timeout", data=[])
+    except Exception as e:
+        # A failed schedule (bad Gemini key, quota, unparsable reply) must not hide the sources already fetched
+        logger.exception("Scheduling the dashboard for %s failed", session.user_id)
+        schedule.update(status="error", error=str(e) or type(e).__name__, data=[])
+    return ORJSONResponse(content={"jira": jira, "reviews": reviews, "meetings": meetings, "schedule": schedule})
+
+# Team view: many users' sources at once. Upstream loads (cache misses) for the
+# whole team run under one global limit and one limit per source, so a large
+# team queues instead of opening hundreds of upstream calls at once.
+TEAM_CONCURRENCY = upstream.env_int("TEAM_CONCURRENCY", 16)
+TEAM_SOURCE_CONCURRENCY = upstream.env_int("TEAM_SOURCE_CONCURRENCY", 6)
+TEAM_DEADLINE = upstream.env_float("TEAM_DEADLINE", 10.0)
+team_limit = asyncio.Semaphore(TEAM_CONCURRENCY)
+team_source_limits = {name: asyncio.Semaphore(TEAM_SOURCE_CONCURRENCY) for name in SOURCE_FETCHERS}
+team_stats = {"requests": 0, "loads": 0, "max_in_flight": 0}
+team_in_flight = 0
+
+def team_loader(name):
+    """``SOURCE_FETCHERS[name]`` run under the team limits."""
+    fetcher = SOURCE_FETCHERS[name]
+    async def load(session):
+        global team_in_flight
+        if name == "meetings" and not await session.graph_auth.has_session():
+            # Checked before taking a team slot; fetch_calendar_events checks again
+            raise not_signed_in(session)
+        async with team_source_limits[name], team_limit:
+            team_in_flight += 1
+            team_stats["loads"] += 1
+            team_stats["max_in_flight"] = max(team_stats["max_in_flight"], team_in_flight)
+            try:
+                return await fetcher(session)
+            finally:
+                team_in_flight -= 1
+    return load
+
+async def fetch_member(session, deadline, fresh):
+    jira, reviews, meetings = await asyncio.gather(*(
+        fetch_source(session, name, deadline, fresh, loader=team_loader(name)) for name in SOURCE_FETCHERS
+    ))
+    return {"jira": jira, "reviews": reviews, "meetings": meetings}
+
+@app.get("/api/team/")
+async def get_team(request: Request, users_: str = Query("", alias="users"), deadline: float = TEAM_DEADLINE, fresh: bool = False):
+    requested, denied = team_members(request, users_)
+    if denied:
+        return denied
+    team_stats["requests"] += 1
+    # One deadline for the whole team: members still queued when it passes get their last known data
+    members = await asyncio.gather(*(fetch_member(users.get(user), deadline, fresh) for user in requested))
+    return ORJSONResponse(content=dict(zip(requested, members)))
+
+@app.get("/api/team/free/")
+async def get_team_free(request: Request, users_: str = Query("", alias="users"), min_minutes: int = 30, quorum: int = None,
+                        deadline: float = TEAM_DEADLINE, fresh: bool = False):
+    """Working time today when the team (or at least ``quorum`` of it) has no meetings."""
+    requested, denied = team_members(request, users_)
+    if denied:
+        return denied
+    team_stats["requests"] += 1
+    meetings = await asyncio.gather(*(
+        fetch_source(users.get(user), "meetings", deadline, fresh, loader=team_loader("meetings")) for user in requested
+    ))
+    # Meetings are fetched for today only; FreeBusy itself covers any number of days
+    today = datetime.now(get_localzone()).date()
+    free_busy = FreeBusy([member["data"] for member in meetings], today, today=today)
+    return ORJSONResponse(content={
+        "slots": free_busy.common_free(min_minutes, quorum),
+        "utilization": dict(zip(requested, free_busy.utilization().round(3).tolist())),
+        # Their meetings could not be read in time, so may be missing or out of date
+        "unavailable": [user for user, member in zip(requested, meetings) if member["status"] not in ("ok", "stale")],
+    })
+
+# Microsoft Graph sign-in: the device code goes back to the signed-in caller, never to the server console
+@app.post("/api/auth/graph/device")
+async def start_graph_sign_in(request: Request):
+    session, denied = caller_session(request)
+    if denied:
+        return denied
+    graph_auth = session.graph_auth
+    if await graph_auth.has_session():
+        return ORJSONResponse(content={"status": "signed_in"})
     try:
-        parsed_json = json.loads(cleaned_text)
-        with open('AI_Task_Scheduler.json', 'w') as f:
-            json.dump(parsed_json, f, indent=4)
-        return JSONResponse(content=parsed_json)
+        flow = await graph_auth.start_device_flow()
+    except UpstreamError as e:
+        return error_response(e)
+    # Poll this endpoint (or just reload) until it answers "signed_in"
+    return ORJSONResponse(status_code=202, content={
+        "status": "pending",
+        "user_code": flow["user_code"],
+        "verification_uri": flow["verification_uri"],
+        "message": flow["message"],
+        "expires_in": max(int(flow["expires_at"] - time.time()), 0),
+    })
+
+# Push updates
+EVENTS_KEEPALIVE = upstream.env_float("EVENTS_KEEPALIVE", 15)
+
+@app.get("/api/events")
+async def stream_updates(request: Request, user: str = None):
+    session, denied = caller_session(request, user, query_key=True)
+    if denied:
+        return denied
+    live_updates = session.live_updates
+    queue = live_updates.subscribe()
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event("patch", event)
+        finally:
+            live_updates.unsubscribe(queue)
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Webhooks: Jira passes WEBHOOK_SECRET as ?secret=, Review Board signs the body with it, Graph echoes it as clientState.
+# Each user's webhooks are registered with ?user=<id> in the URL. Without a secret, webhooks are refused.
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+JIRA_KEY = re.compile(r"^[A-Z][A-Z0-9_]*-\d+$")
+
+def webhook_forbidden():
+    return ORJSONResponse(status_code=403, content={"error": "Invalid webhook secret"})
+
+def webhooks_disabled():
+    return ORJSONResponse(status_code=503, content={"error": "Webhooks are disabled: WEBHOOK_SECRET is not set"})
+
+def invalid_body():
+    return ORJSONResponse(status_code=400, content={"error": "Body is not valid JSON"})
+
+def json_body(body):
+    """The decoded JSON object, or ``None`` if ``body`` is not one."""
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+def patch_cached(session, name, source, patch):
+    """Apply ``patch(records)`` to a loaded source; one nobody has fetched yet is left to its first fetch."""
+    cache = response_caches[name]
+    current = cache.peek(session.user_id)
+    if current is None:
+        return None
+    updated = patch(current)
+    cache.set(session.user_id, updated)
+    session.snapshot_store.publish(source, updated)
+    return updated
+
+@app.post("/api/webhooks/jira")
+async def jira_webhook(request: Request, secret: str = "", user: str = DEFAULT_USER):
+    if not WEBHOOK_SECRET:
+        return webhooks_disabled()
+    if not hmac.compare_digest(secret.encode(), WEBHOOK_SECRET.encode()):
+        return webhook_forbidden()
+    session = users.get(user)
+    if session is None:
+        return unknown_user(user)
+    payload = json_body(await request.body())
+    if payload is None:
+        return invalid_body()
+    key = (payload.get("issue") or {}).get("key")
+    if not isinstance(key, str) or not JIRA_KEY.match(key):
+        return ORJSONResponse(status_code=400, content={"error": "No issue key in payload"})
+    # Only the key is taken from the payload; the issue itself is re-read from Jira
+    try:
+        issue = await session.jira_store.sync_issue(session.jira(), key)
+    except UpstreamError as e:
+        return error_response(e)
+
+    def patch(records):
+        records = remove(records, "Issue Key", key)
+        # Just updated, so it goes first like in the JQL's "updated DESC"
+        return [filtered_jira_json(issue)] + records if issue is not None else records
+    patch_cached(session, "jira", snapshots.JIRA, patch)
+    return ORJSONResponse(content={"key": key, "action": "upsert" if issue is not None else "remove"})
+
+@app.post("/api/webhooks/reviewboard")
+async def reviewboard_webhook(request: Request, user: str = DEFAULT_USER):
+    body = await request.body()
+    if not WEBHOOK_SECRET:
+        return webhooks_disabled()
+    expected = "sha1=" + hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha1).hexdigest()
+    if not hmac.compare_digest(request.headers.get("X-Hub-Signature", "").encode(), expected.encode()):
+        return webhook_forbidden()
+    session = users.get(user)
+    if session is None:
+        return unknown_user(user)
+    payload = json_body(body)
+    if payload is None:
+        return invalid_body()
+    review_request = payload.get("review_request") or {}
+    if not isinstance(review_request, dict) or not isinstance(review_request.get("id"), int):
+        return ORJSONResponse(status_code=400, content={"error": "No review request in payload"})
+    if response_caches["review-board"].peek(session.user_id) is None:
+        return ORJSONResponse(status_code=202, content={"id": review_request["id"], "action": "ignored"})
+    try:
+        record = await session.reviewboard_sync.apply(session.reviewboard(), session.jira(),
+                                                      review_request, removed=payload.get("event") == "review_request_closed")
+    except UpstreamError as e:
+        return error_response(e)
+
+    def patch(records):
+        # The cached list may have been restored or filled by another worker, so only this request changes
+        records = remove(records, "id", review_request["id"])
+        # Just updated, so it goes first like the newest-first sync order
+        return [record] + records if record is not None else records
+    patch_cached(session, "review-board", snapshots.REVIEWS, patch)
+    return ORJSONResponse(content={"id": review_request["id"], "action": "upsert" if record is not None else "remove"})
+
+def in_today_window(event):
+    # Same UTC day fetch_calendar_events asks Graph for
+    today = datetime.utcnow().date().isoformat()
+    return event.get("start", {}).get("dateTime", "")[:10] <= today <= event.get("end", {}).get("dateTime", "")[:10]
+
+async def apply_graph_notifications(session, notifications):
+    graph_auth = session.graph_auth
+    profile = graph_auth.cached_profile
+    if response_caches["meetings"].peek(session.user_id) is None or profile is None:
+        return
+    graph = session.graph()
+    local_tz = get_localzone()
+    for notification in notifications:
+        event_id = (notification.get("resourceData") or {}).get("id")
+        if not event_id:
+            continue
+        event = None
+        if notification.get("changeType") != "deleted":
+            try:
+                event = await session.calendar_fetcher.fetch_event(graph, await graph_auth.headers(), event_id)
+            except UpstreamError as e:
+                logger.warning("Fetching notified event %s failed: %s", event_id, e.detail)
+                continue
+        record = format_event(event, True, profile.get("mail") or "", local_tz) if event and in_today_window(event) else None
+
+        def patch(records):
+            records = remove(records, "id", event_id)
+            if record is not None:
+                records = sorted(records + [record], key=lambda meeting: parse_clock(meeting["start"]) or 0)
+            return records
+        patch_cached(session, "meetings", snapshots.MEETINGS, patch)
 
-    except requests.exceptions.RequestException as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
+@app.post("/api/webhooks/graph")
+async def graph_webhook(request: Request, background_tasks: BackgroundTasks, validationToken: str = None, user: str = DEFAULT_USER):
+    if not WEBHOOK_SECRET:
+        return webhooks_disabled()
+    # Subscription handshake: Graph expects the token echoed back as plain text
+    if validationToken is not None:
+        return PlainTextResponse(validationToken)
+    session = users.get(user)
+    if session is None:
+        return unknown_user(user)
+    payload = json_body(await request.body())
+    if payload is None:
+        return invalid_body()
+    notifications = [n for n in payload.get("value") or [] if isinstance(n, dict)]
+    accepted = [n for n in notifications if hmac.compare_digest(str(n.get("clientState") or "").encode(), WEBHOOK_SECRET.encode())]
+    if len(accepted) < len(notifications):
+        logger.warning("Ignored %d Graph notifications with a wrong clientState", len(notifications) - len(accepted))
+    # Graph wants an answer within 3 seconds, so events are fetched after responding
+    background_tasks.add_task(apply_graph_notifications, session, accepted)
+    return ORJSONResponse(status_code=202, content={"accepted": len(accepted)})
@@ -0,0 +1,168 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Seconds; covers cached responses through slow Gemini generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metrics = []
+# Per-request {target: [total seconds, calls]} for the Server-Timing header
+_timings = contextvars.ContextVar("server_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [bucket counts..., sum, count]
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        labelnames = self.labelnames + ("le",)
+        for key, series in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_label_text(labelnames, key + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_label_text(labelnames, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+UPSTREAM_DURATION = Histogram("taskit_upstream_request_duration_seconds", "Outbound call latency, including time queued for a concurrency slot.", ["upstream", "method"])
+UPSTREAM_QUEUE = Histogram("taskit_upstream_queue_seconds", "Time spent waiting for an upstream concurrency slot.", ["upstream"])
+UPSTREAM_REQUESTS = Counter("taskit_upstream_requests_total", "Outbound calls by result (HTTP status or exception name).", ["upstream", "method", "status"])
+UPSTREAM_SENT_BYTES = Counter("taskit_upstream_request_bytes_total", "Request body bytes sent upstream.", ["upstream"])
+UPSTREAM_RECEIVED_BYTES = Counter("taskit_upstream_response_bytes_total", "Response body bytes received from upstream.", ["upstream"])
+UPSTREAM_RETRIES = Counter("taskit_upstream_retries_total", "Outbound calls repeated after a failure.", ["upstream"])
+UPSTREAM_REJECTED = Counter("taskit_upstream_rejected_total", "Outbound calls failed fast because the upstream's circuit was open.", ["upstream"])
+UPSTREAM_CIRCUIT = Counter("taskit_upstream_circuit_transitions_total", "Circuit breaker state changes.", ["upstream", "state"])
+HTTP_DURATION = Histogram("taskit_http_request_duration_seconds", "Time to produce API responses (streamed bodies excluded).", ["path", "status"])
+
+
+def observe_upstream(upstream, method, status, seconds, sent=0, received=0):
+    UPSTREAM_DURATION.observe(seconds, upstream=upstream, method=method)
+    UPSTREAM_REQUESTS.inc(upstream=upstream, method=method, status=str(status))
+    if sent:
+        UPSTREAM_SENT_BYTES.inc(sent, upstream=upstream)
+    if received:
+        UPSTREAM_RECEIVED_BYTES.inc(received, upstream=upstream)
+    record_timing(upstream, seconds)
+
+
+def record_retry(upstream):
+    UPSTREAM_RETRIES.inc(upstream=upstream)
+
+
+def record_rejected(upstream):
+    UPSTREAM_REJECTED.inc(upstream=upstream)
+
+
+def record_circuit(upstream, state):
+    UPSTREAM_CIRCUIT.inc(upstream=upstream, state=state)
+
+
+@contextmanager
+def timed(upstream, method):
+    """Instrument a non-HTTP-client call (an SDK call such as MSAL or Gemini)."""
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = type(e).__name__
+        raise
+    finally:
+        observe_upstream(upstream, method, status, time.perf_counter() - started)
+
+
+def start_request_timings():
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def record_timing(target, seconds):
+    timings = _timings.get()
+    if timings is not None:
+        ended = time.perf_counter()
+        timings.setdefault(target, []).append((ended - seconds, ended))
+
+
+def wall_time(intervals):
+    """Seconds covered by at least one of ``intervals``: concurrent calls count once."""
+    covered, reached = 0.0, None
+    for started, ended in sorted(intervals):
+        if reached is None or started > reached:
+            covered += ended - started
+            reached = ended
+        elif ended > reached:
+            covered += ended - reached
+            reached = ended
+    return covered
+
+
+def server_timing(timings, total_seconds):
+    """``Server-Timing`` value: wall-clock time spent waiting on each target, plus the whole request as ``total``.
+
+    ``dur`` is the union of the target's call intervals, so it never exceeds
+    ``total``; the call count and summed call time go in ``desc``.
+    """
+    parts = []
+    for target, intervals in timings.items():
+        calls = len(intervals)
+        summed = sum(ended - started for started, ended in intervals)
+        desc = f'{calls} call{"s" if calls != 1 else ""}, {summed * 1000:.1f} ms summed'
+        parts.append(f'{target};dur={wall_time(intervals) * 1000:.1f};desc="{desc}"')
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
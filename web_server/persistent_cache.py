@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+import orjson
+from upstream import env_float
+
+logger = logging.getLogger(__name__)
+
+# Entries older than this are not restored at all
+MAX_AGE = env_float("PERSISTENT_CACHE_MAX_AGE", 7 * 24 * 3600)
+# Seconds a connection waits for another worker's write lock
+BUSY_TIMEOUT = env_float("PERSISTENT_CACHE_BUSY_TIMEOUT", 5.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache TEXT NOT NULL,
+    key TEXT NOT NULL,
+    schema INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (cache, key)
+);
+"""
+
+# Keeps the newest copy when several workers write the same entry
+UPSERT = """
+INSERT INTO entries (cache, key, schema, stored_at, expires_at, data) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (cache, key) DO UPDATE SET
+    schema = excluded.schema, stored_at = excluded.stored_at, expires_at = excluded.expires_at, data = excluded.data
+WHERE excluded.stored_at >= entries.stored_at
+"""
+
+Record = namedtuple("Record", "value stored_at expires_at")
+
+
+class PersistentCache:
+    """SQLite copy of cached upstream data and schedules that survives restarts.
+
+    The database runs in WAL mode, so any number of uvicorn workers can read
+    while one writes, and a write only replaces an entry with a newer one.
+    Each entry records when it was fetched and the ``schema`` version of its
+    records; reads with a different version (or older than ``MAX_AGE``) find
+    nothing. Writes happen in a background thread, and repeated saves of one
+    entry while a write is pending collapse into one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._schema_ready = False
+        self._pending = {}
+        self._tasks = {}
+        self.reads = 0
+        self.writes = 0
+        self.write_errors = 0
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        try:
+            if not self._schema_ready:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.executescript(SCHEMA)
+                self._schema_ready = True
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _select(self, cache, schema, key=None):
+        query = "SELECT key, stored_at, expires_at, data FROM entries WHERE cache = ? AND schema = ? AND stored_at > ?"
+        params = [cache, schema, time.time() - MAX_AGE]
+        if key is not None:
+            query += " AND key = ?"
+            params.append(key)
+        with self._connect() as db:
+            rows = db.execute(query, params).fetchall()
+        return {key: Record(orjson.loads(data), stored_at, expires_at) for key, stored_at, expires_at, data in rows}
+
+    async def read(self, cache, key, schema=1):
+        """The stored ``Record`` for ``key``, or ``None``."""
+        self.reads += 1
+        try:
+            return (await asyncio.to_thread(self._select, cache, schema, key)).get(key)
+        except sqlite3.Error as e:
+            logger.warning("Reading %s/%s from the persistent cache failed: %s", cache, key, e)
+            return None
+
+    async def read_all(self, cache, schema=1):
+        self.reads += 1
+        try:
+            return await asyncio.to_thread(self._select, cache, schema)
+        except sqlite3.Error as e:
+            logger.warning("Reading %s from the persistent cache failed: %s", cache, e)
+            return {}
+
+    def save(self, cache, key, value, schema=1, expires_at=None):
+        """Queue ``value`` to be written in the background."""
+        self._pending[(cache, key)] = (schema, time.time(), expires_at, value)
+        if (cache, key) in self._tasks:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._write((cache, key)))
+        except RuntimeError:
+            return
+        self._tasks[(cache, key)] = task
+
+    async def _write(self, entry):
+        try:
+            await asyncio.sleep(0)  # let the response go out first
+            while entry in self._pending:
+                schema, stored_at, expires_at, value = self._pending.pop(entry)
+                row = (*entry, schema, stored_at, expires_at, orjson.dumps(value))
+                await asyncio.to_thread(self._write_row, row)
+                self.writes += 1
+        except Exception as e:
+            self.write_errors += 1
+            logger.warning("Writing %s/%s to the persistent cache failed: %s", *entry, e)
+        finally:
+            self._tasks.pop(entry, None)
+
+    def _write_row(self, row):
+        with self._connect() as db:
+            db.execute(UPSERT, row)
+
+    async def flush(self):
+        """Wait for queued writes (on shutdown)."""
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stats(self):
+        return {"path": self.path, "reads": self.reads, "writes": self.writes, "write_errors": self.write_errors, "pending": len(self._tasks)}
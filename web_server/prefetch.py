@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from upstream import env_float
+
+logger = logging.getLogger(__name__)
+
+# Local-time working window: hours [start, end) on the listed weekdays (Mon=0)
+WORKING_HOURS = os.getenv("PREFETCH_HOURS", "8-18")
+WORKING_DAYS = os.getenv("PREFETCH_DAYS", "0-4")
+JITTER = env_float("PREFETCH_JITTER", 0.1)
+MAX_BACKOFF = env_float("PREFETCH_MAX_BACKOFF", 900)
+
+
+def parse_range(text):
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
+
+
+class WorkingHours:
+    def __init__(self, hours=WORKING_HOURS, days=WORKING_DAYS):
+        self.start_hour, self.end_hour = parse_range(hours)
+        first_day, last_day = parse_range(days)
+        self.days = set(range(first_day, last_day + 1))
+
+    def contains(self, now):
+        return now.weekday() in self.days and self.start_hour <= now.hour < self.end_hour
+
+    def seconds_until_open(self, now=None):
+        """0 inside the window, otherwise the seconds until it next opens."""
+        now = now or datetime.now()
+        if self.contains(now):
+            return 0
+        opening = now.replace(hour=self.start_hour, minute=0, second=0, microsecond=0)
+        if opening <= now:
+            opening += timedelta(days=1)
+        while opening.weekday() not in self.days:
+            opening += timedelta(days=1)
+        return (opening - now).total_seconds()
+
+
+class PrefetchJob:
+    """One source refreshed every ``interval`` seconds; ``ready()`` can veto a run (e.g. not signed in)."""
+
+    def __init__(self, name, refresh, interval, ready=None):
+        self.name = name
+        self.refresh = refresh
+        self.interval = interval
+        self.ready = ready
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_success = None
+        self.last_error = None
+        self.next_run = None
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+            "next_run": self.next_run,
+        }
+
+
+class Prefetcher:
+    """Keeps source data warm by refreshing each job on its own cadence.
+
+    Each job runs in its own task: it waits for working hours, refreshes,
+    and sleeps ``interval`` (with +/- ``jitter``) before the next run. After
+    a failure the delay doubles per consecutive failure, up to ``max_backoff``.
+    """
+
+    def __init__(self, jobs, working_hours=None, jitter=JITTER, max_backoff=MAX_BACKOFF):
+        self.jobs = jobs
+        self.working_hours = working_hours or WorkingHours()
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self._tasks = []
+
+    def _delay(self, job):
+        if job.consecutive_failures:
+            delay = min(job.interval * 2 ** job.consecutive_failures, max(self.max_backoff, job.interval))
+        else:
+            delay = job.interval
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _run(self, job, first_delay):
+        await asyncio.sleep(first_delay)
+        while True:
+            closed_for = self.working_hours.seconds_until_open()
+            if closed_for:
+                job.next_run = time.time() + closed_for
+                await asyncio.sleep(closed_for)
+                continue
+            try:
+                if job.ready is None or await job.ready():
+                    job.runs += 1
+                    await job.refresh()
+                    job.consecutive_failures = 0
+                    job.last_success = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.failures += 1
+                job.consecutive_failures += 1
+                job.last_error = str(e) or type(e).__name__
+                logger.warning("Prefetch of %s failed (%d in a row): %s", job.name, job.consecutive_failures, job.last_error)
+            delay = self._delay(job)
+            job.next_run = time.time() + delay
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._tasks:
+            return
+        for index, job in enumerate(self.jobs):
+            # Stagger the first runs so the sources do not all start at once
+            self._tasks.append(asyncio.create_task(self._run(job, index * random.uniform(0, 1))))
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {job.name: job.stats() for job in self.jobs}
@@ -0,0 +1,59 @@
+import math
+from scheduler import ranked_tasks
+from upstream import env_int
+
+# Only the columns the scheduling rules refer to
+CALENDAR_COLUMNS = ["subject", "start", "end", "organizer"]
+REVIEW_COLUMNS = ["id", "description", "due_date"]
+JIRA_COLUMNS = ["Issue Key", "Summary", "Severity", "Stopper", "priority"]
+
+TOKEN_BUDGET = env_int("PROMPT_TOKEN_BUDGET", 6000)
+MAX_TEXT = env_int("PROMPT_MAX_TEXT", 120)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def cell(value):
+    if value is None:
+        return ""
+    text = " ".join(str(value).replace("|", "/").split())
+    return text if len(text) <= MAX_TEXT else text[:MAX_TEXT - 3] + "..."
+
+
+def row(item, columns):
+    return "|".join(cell(item.get(column)) for column in columns)
+
+
+def encode_inputs(calendar, reviews, jira_tasks, budget=TOKEN_BUDGET, reserved_tokens=0):
+    """Encode the scheduler inputs as compact ``|``-separated tables within a token budget.
+
+    Meetings are always kept. Reviews and Jira issues are added in scheduling
+    priority order until the estimated prompt size reaches ``budget``; the
+    rest are dropped. Returns ``(text, stats)``.
+    """
+    meetings = [row(event, CALENDAR_COLUMNS) for event in calendar]
+    headers = ["|".join(CALENDAR_COLUMNS), "|".join(REVIEW_COLUMNS), "|".join(JIRA_COLUMNS)]
+    used = reserved_tokens + estimate_tokens("\n".join(meetings + headers)) + 30
+
+    kept = {"Review": [], "Jira": []}
+    dropped = 0
+    for task_type, task in ranked_tasks(jira_tasks, reviews):
+        line = row(task, REVIEW_COLUMNS if task_type == "Review" else JIRA_COLUMNS)
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            dropped += 1
+            continue
+        kept[task_type].append(line)
+        used += cost
+
+    sections = [
+        ("Meetings", headers[0], meetings),
+        ("Reviews", headers[1], kept["Review"]),
+        ("Jira", headers[2], kept["Jira"]),
+    ]
+    text = "\n\n".join(f"### {title} ###\n" + "\n".join([header] + lines) for title, header, lines in sections)
+    stats = {"estimated_tokens": reserved_tokens + estimate_tokens(text), "dropped_items": dropped}
+    return text, stats
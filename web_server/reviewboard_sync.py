@@ -0,0 +1,162 @@
+import logging
+import time
+import httpx
+from jira_enrich import fetch_issue_fields
+from upstream import UpstreamError, env_float, env_int, transport_error
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = env_float("REVIEWBOARD_SESSION_TTL", 8 * 3600)
+FULL_SYNC_INTERVAL = env_float("REVIEWBOARD_FULL_SYNC_INTERVAL", 3600)
+PAGE_SIZE = env_int("REVIEWBOARD_PAGE_SIZE", 200)
+
+
+class ReviewBoardSync:
+    """Keeps an enriched snapshot of the user's incoming review requests.
+
+    The list is polled with ``last-updated-from`` set to the newest
+    ``last_updated`` already held, so the URL only changes when something
+    did, and with ``If-None-Match``/``If-Modified-Since`` so an unchanged
+    poll is a 304 that returns the snapshot without parsing or enrichment.
+    A full listing runs on first use and every ``FULL_SYNC_INTERVAL`` seconds
+    to drop requests that left the user's queue without being updated.
+    """
+
+    def __init__(self, transform):
+        self.transform = transform
+        self.username = None
+        self.username_expires = 0
+        self.records = {}
+        self.snapshot = []
+        self.high_water = None
+        self.validators = {}
+        self.last_full_sync = 0
+        self.last_stats = {}
+        # Review request id -> (normalized Jira key, whether Jira returned it)
+        self.jira_keys = {}
+
+    async def _username(self, reviewboard):
+        if self.username and time.monotonic() < self.username_expires:
+            return self.username
+        response = await reviewboard.get("/api/session/")
+        if response.status_code != 200:
+            raise UpstreamError(response.status_code, "Failed to fetch Review Board user info")
+        self.username = response.json()['session']['links']['user']['title']
+        self.username_expires = time.monotonic() + SESSION_TTL
+        return self.username
+
+    async def _list(self, reviewboard, params, conditional):
+        headers = {}
+        if conditional:
+            etag, last_modified = self.validators.get("etag"), self.validators.get("last_modified")
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = await reviewboard.get("/api/review-requests/", params=params, headers=headers)
+        if response.status_code == 304:
+            return None
+        if response.status_code == 401:
+            self.username = None
+        if response.status_code != 200:
+            # Keeps the upstream's status (e.g. a 429 or 503 left after retries), like the Jira search
+            raise UpstreamError(response.status_code, response.text)
+        self.validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        data = response.json()
+        requests = data.get('review_requests', [])
+        next_link = data.get('links', {}).get('next')
+        while next_link:
+            page = await reviewboard.get(next_link['href'])
+            if page.status_code != 200:
+                raise UpstreamError(page.status_code, page.text)
+            data = page.json()
+            requests.extend(data.get('review_requests', []))
+            next_link = data.get('links', {}).get('next')
+        return requests
+
+    async def _enrich(self, jira, pairs):
+        found, stats = await fetch_issue_fields(jira, [jira_id for _, jira_id in pairs])
+        for request_data, jira_id in pairs:
+            key = jira_id.strip().upper() if jira_id else None
+            fields = found.get(key) if key else None
+            if fields:
+                request_data['labels'] = fields.get('labels', [])
+                request_data['due_date'] = fields.get('duedate', '')
+            self.jira_keys[request_data['id']] = (key, fields is not None)
+        self.last_stats = stats
+
+    def enrichment_counts(self, records):
+        """Distinct Jira keys resolved and missed over ``records``, or ``None`` if some were not enriched by this sync."""
+        resolved, missed = set(), set()
+        for record in records:
+            entry = self.jira_keys.get(record.get('id'))
+            if entry is None:
+                return None
+            key, found = entry
+            if key:
+                (resolved if found else missed).add(key)
+        return {"resolved": len(resolved), "missed": len(missed)}
+
+    def _rebuild_snapshot(self):
+        ordered = sorted(self.records.values(), key=lambda record: record[0], reverse=True)
+        self.snapshot = [request_data for _, request_data in ordered]
+        self.high_water = ordered[0][0] if ordered else None
+
+    async def apply(self, reviewboard, jira, request, removed=False):
+        """Apply one pushed review request (e.g. from a webhook) and return its record, or ``None`` if it left the queue.
+
+        ``high_water`` is left alone: a pushed change may be newer than
+        others the next delta poll still has to pick up. The caller patches
+        the served list by ``id`` rather than taking ``snapshot``, which is
+        empty until this process has synced (e.g. after a cache restore).
+        """
+        try:
+            username = await self._username(reviewboard)
+            mine = any(person.get('title') == username for person in request.get('target_people', []))
+            if removed or not mine or request.get('status', 'pending') != 'pending':
+                self.records.pop(request['id'], None)
+                request_data = None
+            else:
+                request_data, jira_id = self.transform(request)
+                self.records[request['id']] = (request.get('last_updated') or "", request_data)
+                await self._enrich(jira, [(request_data, jira_id)])
+        except httpx.HTTPError as e:
+            raise transport_error(e)
+        ordered = sorted(self.records.values(), key=lambda record: record[0], reverse=True)
+        self.snapshot = [data for _, data in ordered]
+        return request_data
+
+    async def sync(self, reviewboard, jira):
+        """Return ``(review_requests, changed)`` for the current user."""
+        try:
+            username = await self._username(reviewboard)
+            full = not self.last_full_sync or time.monotonic() - self.last_full_sync > FULL_SYNC_INTERVAL
+            params = {"to-users": username, "max-results": PAGE_SIZE}
+            if not full and self.high_water:
+                params.update({"status": "all", "last-updated-from": self.high_water})
+            requests = await self._list(reviewboard, params, conditional=not full)
+            if requests is None:
+                return self.snapshot, False
+
+            if full:
+                self.records = {}
+                self.jira_keys = {}
+                self.last_full_sync = time.monotonic()
+            changed = []
+            for request in requests:
+                last_updated = request.get('last_updated') or ""
+                known = self.records.get(request['id'])
+                if request.get('status', 'pending') != 'pending':
+                    self.records.pop(request['id'], None)
+                elif known is None or known[0] != last_updated:
+                    request_data, jira_id = self.transform(request)
+                    self.records[request['id']] = (last_updated, request_data)
+                    changed.append((request_data, jira_id))
+            if changed:
+                await self._enrich(jira, changed)
+        except httpx.HTTPError as e:
+            raise transport_error(e)
+
+        self._rebuild_snapshot()
+        logger.info("Review Board %s sync: %d of %d requests changed", "full" if full else "delta", len(changed), len(requests))
+        return self.snapshot, True
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from scheduler import DAY_END
+from upstream import env_int
+
+MAX_ENTRIES = env_int("SCHEDULE_CACHE_SIZE", 64)
+
+
+def normalized_inputs(calendar, reviews, jira_tasks):
+    # Order-insensitive: upstream ordering (e.g. by `updated`) does not change the plan's inputs
+    return {
+        "calendar": sorted(calendar, key=lambda event: (str(event.get("start")), str(event.get("subject")))),
+        "reviews": sorted(reviews, key=lambda review: str(review.get("id"))),
+        "jira": sorted(jira_tasks, key=lambda issue: str(issue.get("Issue Key"))),
+    }
+
+
+def input_key(engine, version, calendar, reviews, jira_tasks):
+    payload = {"engine": engine, "version": version, **normalized_inputs(calendar, reviews, jira_tasks)}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def end_of_working_day(now=None):
+    """Epoch seconds at which today's plan stops being useful: 5 PM local, or midnight once past it."""
+    now = now or datetime.now()
+    end = now.replace(hour=DAY_END // 60, minute=DAY_END % 60, second=0, microsecond=0)
+    if now >= end:
+        end = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return end.timestamp()
+
+
+class ScheduleCache:
+    """LRU of scheduler results keyed by a hash of their normalized inputs.
+
+    With a ``PersistentCache`` as ``store``, results are also saved to disk
+    and ``restore()`` reloads the unexpired ones, e.g. after a restart.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.restored = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, expires_at=None):
+        self._remember(key, value, expires_at or end_of_working_day())
+        if self.store is not None:
+            self.store.save("schedule", key, value, expires_at=self._entries[key][1])
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def restore(self):
+        if self.store is None:
+            return
+        now = time.time()
+        records = await self.store.read_all("schedule")
+        for key, record in sorted(records.items(), key=lambda item: item[1].stored_at):
+            if key not in self._entries and record.expires_at and record.expires_at > now:
+                self._remember(key, record.value, record.expires_at)
+                self.restored += 1
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "restored": self.restored, "max_entries": self.max_entries}
@@ -0,0 +1,55 @@
+import json
+import orjson
+
+
+class JSONArrayStream:
+    """Incrementally parse the items of a JSON array that arrives in chunks.
+
+    Anything before the opening ``[`` (such as a Markdown code fence) is
+    skipped. ``feed()`` returns the items completed by that chunk; ``done``
+    is set once the closing ``]`` has been seen.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self.done = False
+
+    @property
+    def pending(self):
+        return self._buffer
+
+    def feed(self, chunk):
+        items = []
+        if self.done:
+            return items
+        self._buffer += chunk
+        if not self._started:
+            start = self._buffer.find("[")
+            if start < 0:
+                return items
+            self._buffer = self._buffer[start + 1:]
+            self._started = True
+        while True:
+            buffer = self._buffer.lstrip().lstrip(",").lstrip()
+            self._buffer = buffer
+            if not buffer:
+                break
+            if buffer[0] == "]":
+                self.done = True
+                self._buffer = ""
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break  # item not complete yet
+            if end == len(buffer) and not isinstance(item, (dict, list)):
+                break  # a number or literal may still continue in the next chunk
+            items.append(item)
+            self._buffer = buffer[end:]
+        return items
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
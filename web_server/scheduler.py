@@ -0,0 +1,173 @@
+import bisect
+import heapq
+from datetime import datetime
+
+# Working day and task durations, in minutes from midnight
+DAY_START = 9 * 60
+DAY_END = 17 * 60
+JIRA_MINUTES = 180
+REVIEW_MINUTES = 30
+LUNCH_WINDOW = (11 * 60 + 30, 14 * 60)
+LUNCH_MIN_BLOCK = 120
+LUNCH_MINUTES = 60
+
+SEVERITY_RANK = {"Critical": 0, "Major": 1, "Minor": 2}
+STOPPER_RANK = {"MKT Stopper": 0}
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+
+def parse_clock(value):
+    try:
+        parsed = datetime.strptime(value.strip(), "%I:%M %p")
+    except (AttributeError, ValueError):
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+
+def format_clock(minutes):
+    hour, minute = divmod(minutes, 60)
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{(hour - 1) % 12 + 1:02d}:{minute:02d} {suffix}"
+
+
+class FreeSlots:
+    """Sorted, non-overlapping list of free ``[start, end)`` minute intervals."""
+
+    def __init__(self, start, end):
+        self.slots = [(start, end)] if end > start else []
+
+    def reserve(self, start, end):
+        if end <= start:
+            return
+        # First slot that could overlap is the one just before `start`
+        index = max(bisect.bisect_left(self.slots, (start,)) - 1, 0)
+        updated = self.slots[:index]
+        for slot_start, slot_end in self.slots[index:]:
+            if slot_end <= start or slot_start >= end:
+                updated.append((slot_start, slot_end))
+                continue
+            if slot_start < start:
+                updated.append((slot_start, start))
+            if slot_end > end:
+                updated.append((end, slot_end))
+        self.slots = updated
+
+    def first_fit(self, duration):
+        for slot_start, slot_end in self.slots:
+            if slot_end - slot_start >= duration:
+                return slot_start
+        return None
+
+    def clipped(self, start, end):
+        return [(max(s, start), min(e, end)) for s, e in self.slots if s < end and e > start]
+
+
+def is_canceled(event):
+    subject = event.get("subject") or ""
+    return subject.lower().startswith(("canceled", "cancelled"))
+
+
+def meeting_blocks(calendar):
+    blocks = []
+    for event in calendar:
+        if is_canceled(event):
+            continue
+        start, end = parse_clock(event.get("start")), parse_clock(event.get("end"))
+        if start is None or end is None or end <= DAY_START or start >= DAY_END:
+            continue
+        start, end = max(start, DAY_START), min(end, DAY_END)
+        if end > start:
+            blocks.append((start, end, event))
+    blocks.sort(key=lambda block: block[:2])
+    return blocks
+
+
+def lunch_break(free):
+    candidates = [slot for slot in free.clipped(*LUNCH_WINDOW) if slot[1] - slot[0] >= LUNCH_MIN_BLOCK]
+    if not candidates:
+        return None
+    start, end = max(candidates, key=lambda slot: (slot[1] - slot[0], -slot[0]))
+    lunch_start = start + (end - start - LUNCH_MINUTES) // 2
+    return lunch_start, lunch_start + LUNCH_MINUTES
+
+
+def task_queue(jira_tasks, reviews):
+    """Heap of ``(rank, seq, task)``: reviews by due date then id, then Jira by severity, stopper, priority, key."""
+    heap = []
+    for seq, review in enumerate(reviews):
+        rank = (0, review.get("due_date") or "9999-99-99", review.get("id") or 0)
+        heapq.heappush(heap, (rank, seq, ("Review", review)))
+    offset = len(reviews)
+    for seq, issue in enumerate(jira_tasks, start=offset):
+        rank = (
+            1,
+            SEVERITY_RANK.get(issue.get("Severity"), 3),
+            STOPPER_RANK.get(issue.get("Stopper"), 1),
+            PRIORITY_RANK.get(issue.get("priority"), 3),
+            issue.get("Issue Key") or "",
+        )
+        heapq.heappush(heap, (rank, seq, ("Jira", issue)))
+    return heap
+
+
+def ranked_tasks(jira_tasks, reviews):
+    """``(task_type, task)`` pairs in scheduling priority order."""
+    heap = task_queue(jira_tasks, reviews)
+    return [heapq.heappop(heap)[2] for _ in range(len(heap))]
+
+
+def task_fields(task_type, task):
+    if task_type == "Jira":
+        return {
+            "summary": task.get("Summary"),
+            "task_id": task.get("Issue Key"),
+            "severity": task.get("Severity"),
+            "stopper": task.get("Stopper"),
+        }
+    return {
+        "summary": task.get("description"),
+        "task_id": task.get("id"),
+        "due_date": task.get("due_date"),
+    }
+
+
+def schedule_item(start, end, task_type, **fields):
+    return {"start_time": format_clock(start), "end_time": format_clock(end), "task_type": task_type, **fields}
+
+
+def build_schedule(calendar, reviews, jira_tasks):
+    """Deterministic implementation of the scheduling rules given to the LLM scheduler."""
+    free = FreeSlots(DAY_START, DAY_END)
+    items = []
+    for start, end, event in meeting_blocks(calendar):
+        free.reserve(start, end)
+        items.append((start, schedule_item(start, end, "Meeting", summary=event.get("subject"), organizer=event.get("organizer"))))
+
+    lunch = lunch_break(free)
+    if lunch:
+        free.reserve(*lunch)
+        items.append((lunch[0], schedule_item(*lunch, "Break", summary="Lunch Break", task_id=None)))
+
+    heap = task_queue(jira_tasks, reviews)
+    while heap and free.slots:
+        _, _, (task_type, task) = heapq.heappop(heap)
+        duration = JIRA_MINUTES if task_type == "Jira" else REVIEW_MINUTES
+        fields = task_fields(task_type, task)
+        start = free.first_fit(duration)
+        if start is not None:
+            free.reserve(start, start + duration)
+            items.append((start, schedule_item(start, start + duration, task_type, **fields)))
+            continue
+        # Longer than every free slot: split across the earliest slots
+        part = 0
+        for slot_start, slot_end in list(free.slots):
+            if duration <= 0:
+                break
+            part += 1
+            end = min(slot_end, slot_start + duration)
+            free.reserve(slot_start, end)
+            duration -= end - slot_start
+            items.append((slot_start, schedule_item(slot_start, end, task_type, **{**fields, "summary": f"{fields['summary']} (Part {part})"})))
+
+    items.sort(key=lambda item: item[0])
+    return [item for _, item in items]
@@ -0,0 +1,37 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts ``fn()``; callers arriving while it runs
+    wait on the same task and receive its result or exception. The task is
+    shielded, so a caller that gives up (timeout, disconnect) does not cancel
+    the call for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved even if every waiter has gone away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import orjson
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+JIRA = "jira"
+REVIEWS = "reviews"
+MEETINGS = "meetings"
+SCHEDULE = "schedule"
+
+# File names used when snapshots are persisted (the files the endpoints used to write)
+PERSIST_FILES = {
+    JIRA: "jira.json",
+    REVIEWS: "review_requests.json",
+    MEETINGS: "calendar_events.json",
+    SCHEDULE: "AI_Task_Scheduler.json",
+}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    source: str
+    version: int
+    data: Any
+    published_at: float
+
+
+class SnapshotStore:
+    """Versioned, in-process hand-off of the latest data per source.
+
+    Publishing swaps in a new immutable mapping, so ``view()`` always returns
+    a consistent set of snapshots without locking. When ``persist_dir`` is
+    set, each published snapshot is also written to its JSON file from a
+    background task; rapid publishes of one source collapse into one write.
+    Listeners added with ``add_listener`` are called as
+    ``listener(previous, snapshot)`` on every publish.
+    """
+
+    def __init__(self, persist_dir=None):
+        self.persist_dir = persist_dir
+        self._snapshots = {}
+        self._versions = itertools.count(1)
+        self._pending_writes = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def publish(self, source, data):
+        snapshot = Snapshot(source, next(self._versions), data, time.time())
+        previous = self._snapshots.get(source)
+        self._snapshots = {**self._snapshots, source: snapshot}
+        if self.persist_dir is not None:
+            self._schedule_write(source)
+        for listener in self._listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                logger.warning("Snapshot listener failed for %s: %s", source, e)
+        return snapshot
+
+    def get(self, source):
+        return self._snapshots.get(source)
+
+    def view(self, *sources):
+        snapshots = self._snapshots
+        return {source: snapshots[source] for source in sources or snapshots if source in snapshots}
+
+    def _schedule_write(self, source):
+        if source in self._pending_writes:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._write(source))
+        except RuntimeError:
+            return
+        self._pending_writes[source] = task
+
+    async def _write(self, source):
+        path = os.path.join(self.persist_dir, PERSIST_FILES.get(source, f"{source}.json"))
+        written = None
+        try:
+            await asyncio.sleep(0)  # let the response go out first
+            # Loop so a publish that lands during the write is not lost
+            while self._snapshots[source].version != written:
+                snapshot = self._snapshots[source]
+                await asyncio.to_thread(self._write_file, path, snapshot.data)
+                written = snapshot.version
+        except Exception as e:
+            logger.warning("Persisting %s snapshot failed: %s", source, e)
+        finally:
+            self._pending_writes.pop(source, None)
+
+    @staticmethod
+    def _write_file(path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, path)
@@ -0,0 +1,43 @@
+import time
+
+from upstream import CircuitBreaker
+
+
+def test_opens_after_threshold_consecutive_failures():
+    breaker = CircuitBreaker("test", threshold=3, reset_after=60)
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in() <= 60
+
+
+def test_half_open_lets_one_probe_through(monkeypatch):
+    breaker = CircuitBreaker("test", threshold=1, reset_after=10)
+    breaker.record(False)
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_again(monkeypatch):
+    breaker = CircuitBreaker("test", threshold=1, reset_after=10)
+    breaker.record(False)
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow()
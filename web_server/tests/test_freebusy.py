@@ -0,0 +1,63 @@
+from datetime import date
+
+import numpy as np
+
+from freebusy import MINUTES_PER_DAY, FreeBusy
+
+MONDAY = date(2026, 10, 19)
+
+
+def meeting(start, end, day="Today", subject="Sync"):
+    return {"subject": subject, "date": day, "start": start, "end": end}
+
+
+def free_busy(calendars, days=1):
+    return FreeBusy(calendars, MONDAY, days=days, today=MONDAY)
+
+
+def times(slots):
+    return [(slot["start"], slot["end"]) for slot in slots]
+
+
+def test_common_free_needs_everyone_by_default():
+    calendars = [
+        [meeting("10:00 AM", "11:00 AM")],
+        [meeting("10:30 AM", "12:00 PM"), meeting("03:00 PM", "03:15 PM")],
+    ]
+    slots = free_busy(calendars).common_free(min_minutes=30)
+    assert times(slots) == [("09:00 AM", "10:00 AM"), ("12:00 PM", "03:00 PM"), ("03:15 PM", "05:00 PM")]
+    assert [slot["minutes"] for slot in slots] == [60, 180, 105]
+
+
+def test_quorum_allows_some_people_to_be_busy():
+    calendars = [[meeting("09:00 AM", "05:00 PM")], [meeting("09:00 AM", "10:00 AM")], []]
+    assert times(free_busy(calendars).common_free(min_minutes=30)) == []
+    assert times(free_busy(calendars).common_free(min_minutes=30, quorum=2)) == [("10:00 AM", "05:00 PM")]
+
+
+def test_short_gaps_and_weekends_are_left_out():
+    calendars = [[meeting("09:00 AM", "12:00 PM"), meeting("12:20 PM", "05:00 PM")]]
+    # Monday has a 20-minute gap; Saturday and Sunday are not working days
+    assert free_busy(calendars).common_free(min_minutes=30) == []
+    week = FreeBusy([[]], MONDAY, days=7, today=MONDAY)
+    assert [slot["date"] for slot in week.common_free(min_minutes=30)] == [f"2026-10-{day}" for day in range(19, 24)]
+
+
+def test_canceled_and_overnight_meetings():
+    calendars = [[
+        meeting("10:00 AM", "11:00 AM", subject="Canceled: Retro"),
+        meeting("04:00 PM", "01:00 AM"),
+    ]]
+    fb = free_busy(calendars, days=2)
+    assert times(fb.common_free(min_minutes=30)) == [("09:00 AM", "04:00 PM"), ("09:00 AM", "05:00 PM")]
+    # The overnight meeting runs into the second day and stops at the end of the range
+    assert fb.counts[0, 1, 0] == 1
+    assert fb.counts[0, 1, 60] == 0
+    assert fb.counts.shape == (1, 2, MINUTES_PER_DAY)
+
+
+def test_conflicts_and_utilization():
+    calendars = [[meeting("10:00 AM", "11:00 AM"), meeting("10:30 AM", "12:00 PM")], []]
+    fb = free_busy(calendars)
+    assert times(fb.conflicts(0)) == [("10:30 AM", "11:00 AM")]
+    np.testing.assert_allclose(fb.utilization(), [120 / 480, 0.0])
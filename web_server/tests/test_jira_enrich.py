@@ -0,0 +1,28 @@
+from jira_enrich import chunk_keys, normalize_keys
+
+
+def jql_length(chunk):
+    return len("key in (" + ", ".join(f'"{key}"' for key in chunk) + ")")
+
+
+def test_normalize_keys_dedupes_in_order():
+    assert normalize_keys([" abc-1", "ABC-2", "abc-1", "", None, "  "]) == ["ABC-1", "ABC-2"]
+
+
+def test_chunks_respect_the_key_limit():
+    keys = [f"ABC-{n}" for n in range(250)]
+    chunks = chunk_keys(keys, max_length=10_000, max_keys=100)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert [key for chunk in chunks for key in chunk] == keys
+
+
+def test_chunks_respect_the_jql_length():
+    keys = [f"PROJECT-{n}" for n in range(1000, 1100)]
+    chunks = chunk_keys(keys, max_length=200, max_keys=100)
+    assert len(chunks) > 1
+    assert all(jql_length(chunk) <= 200 for chunk in chunks)
+    assert [key for chunk in chunks for key in chunk] == keys
+
+
+def test_no_keys_no_chunks():
+    assert chunk_keys([]) == []
@@ -0,0 +1,33 @@
+from schedule_stream import JSONArrayStream
+
+
+def feed_all(chunks):
+    parser = JSONArrayStream()
+    items = []
+    for chunk in chunks:
+        items.append(parser.feed(chunk))
+    return parser, items
+
+
+def test_items_are_returned_as_soon_as_they_are_complete():
+    parser, items = feed_all(['```json\n[{"a": 1', '}, {"b"', ': [1, 2]}', ']\n```'])
+    assert items == [[], [{"a": 1}], [{"b": [1, 2]}], []]
+    assert parser.done
+
+
+def test_scalars_wait_for_their_delimiter():
+    parser, items = feed_all(["[1", "2, tr", "ue, nu", "ll]"])
+    assert items == [[], [12], [True], [None]]
+    assert parser.done
+
+
+def test_unterminated_array_is_not_done():
+    parser, items = feed_all(['[{"a": 1}, {"b": 2'])
+    assert items == [[{"a": 1}]]
+    assert not parser.done
+    assert parser.pending == '{"b": 2'
+
+
+def test_input_after_the_array_is_ignored():
+    parser, items = feed_all(['[{"a": 1}]', '[{"b": 2}]'])
+    assert items == [[{"a": 1}], []]
@@ -0,0 +1,84 @@
+from scheduler import build_schedule, format_clock, parse_clock, ranked_tasks
+
+
+def meeting(start, end, subject="Sync"):
+    return {"subject": subject, "start": start, "end": end, "organizer": "Alice"}
+
+
+def jira(key, severity="Major", stopper=None, priority="Medium"):
+    return {"Issue Key": key, "Summary": f"Fix {key}", "Severity": severity, "Stopper": stopper, "priority": priority}
+
+
+def review(review_id, due_date=""):
+    return {"id": review_id, "description": f"Review {review_id}", "due_date": due_date}
+
+
+def slots(schedule):
+    return [(item["start_time"], item["end_time"], item["task_type"]) for item in schedule]
+
+
+def test_clock_round_trip():
+    assert parse_clock("09:30 AM") == 570
+    assert parse_clock("12:00 PM") == 720
+    assert parse_clock("not a time") is None
+    assert format_clock(570) == "09:30 AM"
+    assert format_clock(0) == "12:00 AM"
+    assert format_clock(13 * 60 + 5) == "01:05 PM"
+
+
+def test_lunch_is_centred_in_the_largest_free_block():
+    assert slots(build_schedule([], [], [])) == [("12:15 PM", "01:15 PM", "Break")]
+    # 11:30-12:00 is taken, so the free block is 12:00-14:00
+    schedule = build_schedule([meeting("11:30 AM", "12:00 PM")], [], [])
+    assert ("12:30 PM", "01:30 PM", "Break") in slots(schedule)
+
+
+def test_no_lunch_without_a_two_hour_block():
+    schedule = build_schedule([meeting("12:00 PM", "01:00 PM")], [], [])
+    assert [item["task_type"] for item in schedule] == ["Meeting"]
+
+
+def test_meetings_are_clipped_to_the_day_and_canceled_ones_ignored():
+    schedule = build_schedule([
+        meeting("08:00 AM", "09:30 AM", "Early"),
+        meeting("10:00 AM", "11:00 AM", "Canceled: Retro"),
+        meeting("06:00 PM", "07:00 PM", "Late"),
+    ], [], [])
+    meetings = [item for item in schedule if item["task_type"] == "Meeting"]
+    assert [(item["summary"], item["start_time"], item["end_time"]) for item in meetings] == [("Early", "09:00 AM", "09:30 AM")]
+
+
+def test_priority_order():
+    reviews = [review(2, "2026-01-05"), review(1, "2026-01-05"), review(3, "2026-01-01")]
+    issues = [
+        jira("A-1", severity="Minor"),
+        jira("A-2", severity="Critical", priority="Low"),
+        jira("A-3", severity="Critical", priority="High"),
+        jira("A-4", severity="Critical", stopper="MKT Stopper", priority="Low"),
+    ]
+    order = [task.get("id") or task.get("Issue Key") for _, task in ranked_tasks(issues, reviews)]
+    # Reviews first by due date then id, then Jira by severity, stopper, priority
+    assert order == [3, 1, 2, "A-4", "A-3", "A-2", "A-1"]
+
+
+def test_reviews_fill_the_earliest_gaps():
+    schedule = build_schedule([], [review(1), review(2)], [])
+    assert slots(schedule) == [
+        ("09:00 AM", "09:30 AM", "Review"),
+        ("09:30 AM", "10:00 AM", "Review"),
+        ("12:15 PM", "01:15 PM", "Break"),
+    ]
+
+
+def test_long_tasks_are_split_into_parts_and_the_rest_truncated():
+    issues = [jira(f"A-{n}") for n in range(1, 5)]
+    schedule = build_schedule([], [], issues)
+    assert [(item["start_time"], item["end_time"], item.get("summary")) for item in schedule] == [
+        ("09:00 AM", "12:00 PM", "Fix A-1"),
+        ("12:00 PM", "12:15 PM", "Fix A-3 (Part 1)"),
+        ("12:15 PM", "01:15 PM", "Lunch Break"),
+        ("01:15 PM", "04:15 PM", "Fix A-2"),
+        ("04:15 PM", "05:00 PM", "Fix A-3 (Part 2)"),
+    ]
+    # Nothing is left for A-4
+    assert all(item.get("task_id") != "A-4" for item in schedule)
@@ -0,0 +1,323 @@
+import asyncio
+import contextvars
+import math
+import os
+import random
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+import httpx
+import metrics
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# Pool defaults, overridable per host with <NAME>_MAX_CONNECTIONS / <NAME>_MAX_CONCURRENCY
+DEFAULT_MAX_CONNECTIONS = env_int("UPSTREAM_MAX_CONNECTIONS", 20)
+DEFAULT_MAX_CONCURRENCY = env_int("UPSTREAM_MAX_CONCURRENCY", 10)
+DEFAULT_TIMEOUT = env_float("UPSTREAM_TIMEOUT", 30.0)
+CONNECT_TIMEOUT = env_float("UPSTREAM_CONNECT_TIMEOUT", 5.0)
+KEEPALIVE_EXPIRY = env_float("UPSTREAM_KEEPALIVE_EXPIRY", 60.0)
+# Retries and circuit breaker, also overridable per host (<NAME>_RETRIES, <NAME>_BREAKER_THRESHOLD, ...)
+DEFAULT_RETRIES = env_int("UPSTREAM_RETRIES", 2)
+DEFAULT_RETRY_BACKOFF = env_float("UPSTREAM_RETRY_BACKOFF", 0.25)
+MAX_BACKOFF = env_float("UPSTREAM_MAX_BACKOFF", 8.0)
+# A longer Retry-After is not waited out, even without a request deadline
+MAX_RETRY_AFTER = env_float("UPSTREAM_MAX_RETRY_AFTER", 30.0)
+DEFAULT_BREAKER_THRESHOLD = env_int("UPSTREAM_BREAKER_THRESHOLD", 5)
+DEFAULT_BREAKER_RESET = env_float("UPSTREAM_BREAKER_RESET", 30.0)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds, replace=False):
+    """Bound every upstream call made inside the block (timeouts and retry waits) to ``seconds`` from now.
+
+    An enclosing deadline still applies unless ``replace`` is set (e.g. for
+    each page of a stream that may run longer than one request).
+    """
+    current = None if replace else _deadline.get()
+    token = _deadline.set(min(current, time.monotonic() + seconds) if current else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left():
+    """Seconds until the current deadline, or ``None`` outside of one."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Fails calls to an unhealthy host fast instead of letting them queue up.
+
+    Opens after ``threshold`` consecutive failed attempts (connection errors,
+    timeouts, 429 and 5xx). While open, calls are rejected for ``reset_after``
+    seconds; then one probe is let through (half-open), and its outcome closes
+    the circuit or opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name, threshold, reset_after):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_started = None
+
+    def _transition(self, state):
+        self.state = state
+        metrics.record_circuit(self.name, state)
+
+    def allow(self):
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_after:
+                return False
+            self._transition(self.HALF_OPEN)
+        # One probe at a time; a probe that never reported back (cancelled) is replaced after reset_after
+        if self._probe_started is not None and now - self._probe_started < self.reset_after:
+            return False
+        self._probe_started = now
+        return True
+
+    def record(self, ok):
+        self._probe_started = None
+        if ok:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            self._transition(self.OPEN)
+
+    def retry_in(self):
+        return max(self.opened_at + self.reset_after - time.monotonic(), 0.0)
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+class UpstreamClient:
+    """Long-lived pooled HTTP client for a single upstream host."""
+
+    def __init__(self, name, base_url, headers=None, max_connections=None, max_concurrency=None, http2=True):
+        prefix = name.upper()
+        max_connections = max_connections or env_int(f"{prefix}_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)
+        max_concurrency = max_concurrency or env_int(f"{prefix}_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        self.name = name
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = env_float(f"{prefix}_TIMEOUT", DEFAULT_TIMEOUT)
+        self.max_retries = env_int(f"{prefix}_RETRIES", DEFAULT_RETRIES)
+        self.retry_backoff = env_float(f"{prefix}_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF)
+        self.breaker = CircuitBreaker(
+            name,
+            env_int(f"{prefix}_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD),
+            env_float(f"{prefix}_BREAKER_RESET", DEFAULT_BREAKER_RESET),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            http2=http2 and HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(self.timeout, connect=min(CONNECT_TIMEOUT, self.timeout)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    async def request(self, method, url, retry=None, **kwargs):
+        """Send one logical request: per-call timeout, retries and the circuit breaker.
+
+        Idempotent methods (or any with ``retry=True``) are retried on
+        connection errors, timeouts, 429 and 502-504, waiting ``Retry-After``
+        when the upstream sends one and otherwise a jittered, exponentially
+        growing delay. A retry that could not finish before the current
+        ``deadline()`` is not started. Once retries run out the last response is
+        returned (or the last error raised), as for a single call. While the
+        circuit is open, ``CircuitOpenError`` is raised without calling out.
+        """
+        retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        attempts = self.max_retries + 1 if retry else 1
+        timeout = kwargs.pop("timeout", self.timeout)
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                if attempt == 0:
+                    metrics.record_rejected(self.name)
+                    raise CircuitOpenError(self.name, self.breaker.retry_in())
+                break
+            remaining = time_left()
+            if remaining is not None and remaining <= 0:
+                raise UpstreamError(504, f"Deadline exceeded before calling {self.name}")
+            call_timeout = timeout if remaining is None else min(timeout, remaining)
+            response, error = None, None
+            try:
+                response = await self._send(method, url, timeout=httpx.Timeout(call_timeout, connect=min(CONNECT_TIMEOUT, call_timeout)), **kwargs)
+            except httpx.TransportError as e:
+                self.breaker.record(False)
+                error = e
+            else:
+                self.breaker.record(response.status_code < 500 and response.status_code != 429)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+            delay = self._retry_delay(attempt, response)
+            if attempt + 1 >= attempts or delay is None:
+                break
+            metrics.record_retry(self.name)
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return response
+
+    def _retry_delay(self, attempt, response):
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            if retry_after > MAX_RETRY_AFTER:
+                return None
+            delay = retry_after
+        else:
+            # "Full jitter": spreads retries from many callers instead of synchronising them
+            delay = random.uniform(0, min(MAX_BACKOFF, self.retry_backoff * 2 ** attempt))
+        remaining = time_left()
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    async def _send(self, method, url, **kwargs):
+        started = time.perf_counter()
+        status, sent, received = None, 0, 0
+        try:
+            async with self._semaphore:
+                metrics.UPSTREAM_QUEUE.observe(time.perf_counter() - started, upstream=self.name)
+                response = await self._client.request(method, url, **kwargs)
+            status = response.status_code
+            sent, received = len(response.request.content), len(response.content)
+            return response
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            metrics.observe_upstream(self.name, method, status, time.perf_counter() - started, sent, received)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self):
+        return {**self.breaker.stats(), "timeout": self.timeout, "max_retries": self.max_retries}
+
+
+class AuthorizedClient:
+    """One user's view of a shared ``UpstreamClient``: the same pool, limits and breaker, with that user's credentials."""
+
+    def __init__(self, client, headers):
+        self.client = client
+        self.name = client.name
+        self.headers = headers
+
+    async def request(self, method, url, headers=None, **kwargs):
+        return await self.client.request(method, url, headers={**self.headers, **(headers or {})}, **kwargs)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+
+_clients = {}
+
+
+def register(name, base_url, headers=None, **kwargs):
+    client = UpstreamClient(name, base_url, headers=headers, **kwargs)
+    _clients[name] = client
+    return client
+
+
+def get_client(name):
+    return _clients[name]
+
+
+def stats():
+    return {name: client.stats() for name, client in _clients.items()}
+
+
+async def close_all():
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(client.aclose() for client in clients))
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def transport_error(e):
+    """``UpstreamError`` for a failed ``httpx`` call: 504 when it timed out, 502 otherwise."""
+    status = 504 if isinstance(e, httpx.TimeoutException) else 502
+    # str() of an httpx timeout is often empty, so the exception type is always named
+    return UpstreamError(status, f"{type(e).__name__}: {e}")
+
+
+class CircuitOpenError(UpstreamError):
+    def __init__(self, name, retry_in):
+        super().__init__(503, f"{name} is unavailable (circuit open, retrying in {math.ceil(retry_in)}s)")
+        self.upstream = name
+        self.retry_in = retry_in
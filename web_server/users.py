@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import upstream
+from graph_calendar import CalendarFetcher
+from live_updates import LiveUpdates
+from upstream import AuthorizedClient
+
+logger = logging.getLogger(__name__)
+
+# The user configured through the environment; also used when a request names no user
+DEFAULT_USER = "default"
+USER_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class UserSession:
+    """One user's credentials, sync state and published data.
+
+    The upstream HTTP pools (and their concurrency limits and circuit
+    breakers) are shared; ``jira()`` and ``reviewboard()`` send this user's
+    tokens through them. Graph tokens come from the user's own ``graph_auth``.
+    """
+
+    def __init__(self, user_id, jira_headers, reviewboard_headers, graph_auth, jira_store, reviewboard_sync, snapshot_store):
+        self.user_id = user_id
+        self.jira_headers = jira_headers
+        self.reviewboard_headers = reviewboard_headers
+        self.graph_auth = graph_auth
+        self.jira_store = jira_store
+        self.reviewboard_sync = reviewboard_sync
+        self.snapshot_store = snapshot_store
+        self.calendar_fetcher = CalendarFetcher()
+        self.live_updates = LiveUpdates()
+        self.snapshot_store.add_listener(self.live_updates.on_snapshot)
+
+    def jira(self):
+        return AuthorizedClient(upstream.get_client("jira"), self.jira_headers)
+
+    def reviewboard(self):
+        return AuthorizedClient(upstream.get_client("reviewboard"), self.reviewboard_headers)
+
+    def graph(self):
+        return upstream.get_client("graph")
+
+
+def key_digest(api_key):
+    return hashlib.sha256(api_key.encode()).digest()
+
+
+def load_credentials(path, default):
+    """``{user_id: credentials}`` from the JSON users file, with ``default`` as ``DEFAULT_USER``.
+
+    The file maps user ids to ``jira_token``, ``reviewboard_token``, the
+    ``api_key`` the user authenticates to this server with, and optionally
+    ``graph_token_cache`` (MSAL cache file) or ``graph_token`` and ``team``.
+    """
+    credentials = {DEFAULT_USER: default}
+    if not path or not os.path.exists(path):
+        return credentials
+    with open(path) as f:
+        configured = json.load(f)
+    for user_id, values in configured.items():
+        if not USER_ID.match(user_id):
+            raise ValueError(f"Invalid user id {user_id!r} in {path}")
+        credentials[user_id] = {**default, **values} if user_id == DEFAULT_USER else values
+    logger.info("Loaded credentials for %d users from %s", len(configured), path)
+    return credentials
+
+
+class UserDirectory:
+    """Sessions for the configured users, each built by ``factory(user_id, credentials)`` on first use.
+
+    Only users in ``credentials`` get a session, so memory grows with the
+    team, not with the ids requests happen to name. Callers are identified by
+    their ``api_key``; users without one cannot call the API.
+    """
+
+    def __init__(self, credentials, factory):
+        self.credentials = credentials
+        self.factory = factory
+        self._sessions = {}
+        self._started = False
+        # Looked up by digest, so the keys themselves are not compared one by one
+        self._keys = {}
+        for user_id, values in credentials.items():
+            api_key = values.get("api_key")
+            if not api_key:
+                continue
+            if key_digest(api_key) in self._keys:
+                raise ValueError(f"{user_id} has the same api_key as {self._keys[key_digest(api_key)]}")
+            self._keys[key_digest(api_key)] = user_id
+
+    def ids(self):
+        return list(self.credentials)
+
+    def authenticate(self, api_key):
+        """The id of the user ``api_key`` belongs to, or ``None``."""
+        return self._keys.get(key_digest(api_key)) if api_key else None
+
+    def team(self, user_id):
+        """Ids of the users in ``user_id``'s team (including ``user_id``), or ``[]`` if they have none."""
+        team = self.credentials.get(user_id, {}).get("team")
+        if not team:
+            return []
+        return [member for member, values in self.credentials.items() if values.get("team") == team]
+
+    def get(self, user_id):
+        """The session for ``user_id``, or ``None`` if the user is not configured."""
+        session = self._sessions.get(user_id)
+        if session is None and user_id in self.credentials:
+            session = self._sessions[user_id] = self.factory(user_id, self.credentials[user_id])
+            if self._started:
+                session.graph_auth.start()
+        return session
+
+    def sessions(self):
+        return list(self._sessions.values())
+
+    def start(self):
+        self._started = True
+        for session in self._sessions.values():
+            session.graph_auth.start()
+
+    async def stop(self):
+        self._started = False
+        await asyncio.gather(*(session.graph_auth.stop() for session in self._sessions.values()))